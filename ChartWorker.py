@@ -0,0 +1,109 @@
+# Background worker that renders the dashboard charts off the request path
+#
+# Watches the change feed of the inventory database and, whenever the data (or the date) changes,
+# renders all charts for all dashboard variants in a process pool and stores them as PNG images
+# keyed by data version. The dashboard only loads the ready-made images and renders inline
+# while the worker isn't running.
+#
+# Run with: python ChartWorker.py [--db inventory.db] [--interval 2] [--workers 3]
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")  # No display in worker processes
+
+import pandas as pd
+
+from InventoryApp import InventoryDB
+from InventoryCharts import CHART_DIR, CHARTS, VARIANTS, chart_version, render_png, select_variant
+
+# Older versions are kept for a while, so that pages which are just loading them don't fall back to inline rendering
+KEEP_VERSIONS = 3
+
+
+def render_version(pool, df, version, today, chart_dir):
+    # Renders every chart of every variant in parallel and publishes them all at once by renaming the directory
+    final_dir = os.path.join(chart_dir, version)
+    if os.path.isdir(final_dir):
+        return
+    os.makedirs(chart_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".rendering-", dir=chart_dir)
+    futures = {}
+    for variant in VARIANTS:
+        variant_df = select_variant(df, variant)
+        if variant_df.empty:
+            continue
+        os.makedirs(os.path.join(tmp_dir, variant))
+        for chart in CHARTS:
+            futures[(variant, chart)] = pool.submit(render_png, chart, variant_df, today)
+    for (variant, chart), future in futures.items():
+        try:
+            image = future.result()
+        except Exception as error:
+            # The dashboard renders this chart inline instead
+            print(f"Could not render {chart} ({variant}) for version {version}: {error}")
+            continue
+        with open(os.path.join(tmp_dir, variant, f"{chart}.png"), "wb") as file:
+            file.write(image)
+    try:
+        os.replace(tmp_dir, final_dir)
+    except OSError:
+        # Another worker published this version first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def remove_old_versions(chart_dir, keep=KEEP_VERSIONS):
+    versions = [entry for entry in os.scandir(chart_dir) if entry.is_dir() and not entry.name.startswith(".")]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def remove_unfinished_renders(chart_dir):
+    # Temporary directories left behind by a worker that was stopped while rendering
+    if not os.path.isdir(chart_dir):
+        return
+    for entry in os.scandir(chart_dir):
+        if entry.is_dir() and entry.name.startswith(".rendering-"):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def run_worker(db_name="inventory.db", chart_dir=CHART_DIR, interval=2.0, workers=None):
+    db = InventoryDB(db_name)
+    version = None
+    remove_unfinished_renders(chart_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            today = datetime.today().date()
+            try:
+                # Read the sequence number before the data, so newer changes are never stored under an older version
+                latest_version = chart_version(db.latest_change_seq(), today)
+                if latest_version != version:
+                    df = pd.read_sql("SELECT * FROM inventory", db.conn)
+                    render_version(pool, df, latest_version, today, chart_dir)
+                    remove_old_versions(chart_dir)
+                    # The worker runs all the time, so it also keeps the change feed from growing without bound
+                    db.prune_changes()
+                    version = latest_version
+                    print(f"Rendered charts for version {version}")
+            except (sqlite3.OperationalError, pd.io.sql.DatabaseError) as error:
+                # E.g. the database is locked by a writer, try again on the next check
+                print(f"Could not read the inventory database: {error}")
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the dashboard charts in the background.")
+    parser.add_argument("--db", default="inventory.db")
+    parser.add_argument("--chart-dir", default=CHART_DIR)
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between checks for changes")
+    parser.add_argument("--workers", type=int, default=None, help="rendering processes (default: number of CPUs)")
+    args = parser.parse_args()
+    run_worker(args.db, args.chart_dir, args.interval, args.workers)
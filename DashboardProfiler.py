@@ -0,0 +1,123 @@
+# Per-section profiling for the Streamlit dashboard
+#
+# Enabled with the environment variable INVENTORY_PROFILE=1 or the URL query parameter ?profile=1.
+# Every named section of the script run is timed; with INVENTORY_PROFILE_DIR=<dir> or ?profile=cprofile
+# the whole run is additionally recorded with cProfile and dumped as a .pstats file per rerun
+# (only the newest INVENTORY_PROFILE_KEEP dumps are kept, 50 by default).
+# Inspect a dump with: python -m pstats profiles/<file>.pstats
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_PROFILE_DIR = "profiles"
+# Only the newest dumps are kept, every rerun (including the ones the change poller triggers) writes one
+KEEP_DUMPS = int(os.environ.get("INVENTORY_PROFILE_KEEP", 50))
+
+
+def remove_old_dumps(dump_dir, keep=KEEP_DUMPS):
+    dumps = [entry for entry in os.scandir(dump_dir) if entry.is_file() and entry.name.endswith(".pstats")]
+    dumps.sort(key=lambda entry: entry.name, reverse=True)  # The names start with the time of the run
+    for entry in dumps[keep:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # Removed by another session at the same time
+
+
+class SectionProfiler:
+    # The cProfile recording that is currently running and the thread that started it. A script run that
+    # stops early (exception, st.stop, st.rerun) never reaches finish(), so the next profiler switches it off
+    _running = None
+    _running_lock = threading.Lock()
+
+    def __init__(self, enabled=False, dump_dir=None):
+        self.enabled = enabled
+        self.dump_dir = dump_dir if enabled else None
+        self.timings = []
+        self.current = None
+        self.started = None
+        self.dump_path = None
+        self.profile = None
+        if self.dump_dir:
+            self._start_profile()
+
+    def _start_profile(self):
+        with SectionProfiler._running_lock:
+            running = SectionProfiler._running
+            if running is not None:
+                profile, thread = running
+                if thread is threading.current_thread() or not thread.is_alive():
+                    # Left over from a run that stopped early
+                    profile.disable()
+                    SectionProfiler._running = None
+                else:
+                    # Another session is being profiled right now (only one profiler can be active at a time)
+                    return
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Some other profiling tool is active
+                return
+            self.profile = profile
+            SectionProfiler._running = (profile, threading.current_thread())
+
+    def stop(self):
+        # Stops the cProfile recording, safe to call more than once. Call before leaving the script early
+        if self.profile is None:
+            return
+        self.profile.disable()
+        with SectionProfiler._running_lock:
+            if SectionProfiler._running is not None and SectionProfiler._running[0] is self.profile:
+                SectionProfiler._running = None
+
+    @classmethod
+    def from_request(cls, query_params):
+        # Read the toggle from the environment or from the page URL
+        param = query_params.get("profile", "")
+        env_dir = os.environ.get("INVENTORY_PROFILE_DIR")
+        enabled = os.environ.get("INVENTORY_PROFILE") == "1" or param in ("1", "true", "cprofile") or bool(env_dir)
+        dump_dir = env_dir or (DEFAULT_PROFILE_DIR if param == "cprofile" else None)
+        return cls(enabled, dump_dir)
+
+    def section(self, name):
+        # Closes the running section (if any) and starts timing the next one
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.current is not None:
+            self.timings.append((self.current, now - self.started))
+        self.current = name
+        self.started = now
+
+    def finish(self):
+        # Stops profiling and returns the breakdown as a data frame (one row per section)
+        if not self.enabled:
+            return None
+        self.section(None)
+        if self.profile is not None:
+            self.stop()
+            os.makedirs(self.dump_dir, exist_ok=True)
+            self.dump_path = os.path.join(self.dump_dir, f"rerun-{datetime.now():%Y%m%d-%H%M%S-%f}.pstats")
+            self.profile.dump_stats(self.dump_path)
+            remove_old_dumps(self.dump_dir)
+        breakdown = pd.DataFrame(self.timings, columns=["section", "seconds"])
+        breakdown = breakdown.groupby("section", sort=False, as_index=False)["seconds"].sum()
+        breakdown["ms"] = breakdown["seconds"] * 1000
+        breakdown["share %"] = breakdown["seconds"] / breakdown["seconds"].sum() * 100
+        return breakdown.drop(columns=["seconds"]).set_index("section")
+
+    def top_functions(self, limit=20):
+        # Text summary of the hottest functions of this run, sorted by cumulative time
+        if self.profile is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(self.profile, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
@@ -1,10 +1,119 @@
 # Application for managing the SHSG inventory
 
+import heapq
+import math
 import sqlite3
-from datetime import datetime
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+# Datensatz eines Inventargegenstands, wie er in der Tabelle gespeichert ist (unveränderlich, ohne __dict__)
+class InventoryItem:
+    __slots__ = ("id", "name", "department", "quantity", "expiry_date")
+    _fields = __slots__
+
+    # __setattr__ is blocked, so the slots are written through their descriptors (faster than object.__setattr__)
+    def __init__(self, id, name, department, quantity, expiry_date=None):
+        _set_id(self, id)
+        _set_name(self, name)
+        _set_department(self, department)
+        _set_quantity(self, quantity)
+        _set_expiry_date(self, expiry_date)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InventoryItem is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("InventoryItem is immutable")
+
+    # Iterating gives the values in column order, e.g. for unpacking or tuple(item). Together with
+    # len() and indexing this lets libraries like pandas read the records like plain rows
+    def __iter__(self):
+        return iter((self.id, self.name, self.department, self.quantity, self.expiry_date))
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, InventoryItem):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return (f"InventoryItem(id={self.id!r}, name={self.name!r}, department={self.department!r}, "
+                f"quantity={self.quantity!r}, expiry_date={self.expiry_date!r})")
+
+    # Printed like the plain database rows the CLI has always shown
+    def __str__(self):
+        return str(tuple(self))
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+_set_id, _set_name, _set_department, _set_quantity, _set_expiry_date = (
+    getattr(InventoryItem, field).__set__ for field in InventoryItem._fields)
+
+# Row factory for cursors that select exactly the columns of the inventory table (SELECT * or ITEM_COLUMNS).
+# Records are for reading fields by name, they take about as much memory as tuples (see InventoryMemoryBench.py)
+def item_row_factory(cursor, row):
+    return InventoryItem(*row)
+
+# Spaltenweiser Container für viele Gegenstände: IDs und Mengen in Arrays von Maschinen-Ganzzahlen,
+# wiederholte Namen und Abteilungen teilen sich ein String-Objekt
+class InventoryBatch:
+    __slots__ = ("ids", "names", "departments", "quantities", "expiry_dates", "_strings")
+
+    def __init__(self, rows=()):
+        self.ids = array("q")
+        self.names = []
+        self.departments = []
+        self.quantities = array("q")
+        self.expiry_dates = []
+        self._strings = {}
+        self.extend(rows)
+
+    def _share(self, value):
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def append(self, id, name, department, quantity, expiry_date=None):
+        self.ids.append(id)
+        self.names.append(self._share(name))
+        self.departments.append(self._share(department))
+        self.quantities.append(quantity)
+        self.expiry_dates.append(self._share(expiry_date))
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(*row)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        return InventoryItem(self.ids[index], self.names[index], self.departments[index],
+                             self.quantities[index], self.expiry_dates[index])
+
+    def __iter__(self):
+        return map(InventoryItem, self.ids, self.names, self.departments, self.quantities, self.expiry_dates)
+
+    def total_quantity(self):
+        return sum(self.quantities)
+
+    def columns(self):
+        # Column name -> values, e.g. for pd.DataFrame(batch.columns())
+        return dict(zip(InventoryItem._fields, (self.ids, self.names, self.departments, self.quantities, self.expiry_dates)))
 
 # Superklasse für alle Inventargegenstände
 class Inventory:
+    __slots__ = ("name", "department", "quantity")
     VALID_DEPARTMENTS = ["ClubA", "ClubB", "ClubC", "General"]
 
     def __init__(self, name, department, quantity):
@@ -17,8 +126,9 @@ class Inventory:
             return None
         return department
 
-    def create_item(self, conn):
+    def create_item(self, conn, verbose=True):
         cursor = conn.cursor()
+        cursor.row_factory = item_row_factory
         cursor.execute('''
             SELECT * FROM inventory
             WHERE name = ? AND department = ?
@@ -26,23 +136,25 @@ class Inventory:
         existing_item = cursor.fetchone()
 
         if existing_item:
-            adjusted_quantity = existing_item[3] + self.quantity
+            adjusted_quantity = existing_item.quantity + self.quantity
             cursor.execute('''
                 UPDATE inventory
                 SET quantity = ?
                 WHERE name = ? AND department = ?
             ''', (adjusted_quantity, self.name, self.department))
             conn.commit()
-            print(f"Item '{self.name}' already exists in '{self.department}' department. Quantity updated.")
+            if verbose:
+                print(f"Item '{self.name}' already exists in '{self.department}' department. Quantity updated.")
         else:
             cursor.execute('''
                 INSERT INTO inventory (name, department, quantity)
                 VALUES (?, ?, ?)
             ''', (self.name, self.department, self.quantity))
             conn.commit()
-            print(f"Item '{self.name}' added to inventory.")
+            if verbose:
+                print(f"Item '{self.name}' added to inventory.")
 
-    def update_quantity(self, conn, quantity):
+    def update_quantity(self, conn, quantity, verbose=True):
         # Retrieve the current quantity from the database
         cursor = conn.cursor()
         cursor.execute('''
@@ -52,7 +164,8 @@ class Inventory:
         result = cursor.fetchone()
 
         if result is None:
-            print(f"Item '{self.name}' does not exist in department '{self.department}'. Cannot update quantity.")
+            if verbose:
+                print(f"Item '{self.name}' does not exist in department '{self.department}'. Cannot update quantity.")
             return
 
         current_quantity = result[0] 
@@ -75,12 +188,15 @@ class Inventory:
 
 # Subklasse für verderbliche Gegenstände
 class InventoryPerishable(Inventory):
+    __slots__ = ("expiry_date",)
+
     def __init__(self, name, department, quantity, expiry_date):
         super().__init__(name, department, quantity)
         self.expiry_date = expiry_date
 
-    def create_item(self, conn):
+    def create_item(self, conn, verbose=True):
         cursor = conn.cursor()
+        cursor.row_factory = item_row_factory
         cursor.execute('''
             SELECT * FROM inventory
             WHERE name = ? AND department = ? AND expiry_date = ?
@@ -88,26 +204,120 @@ class InventoryPerishable(Inventory):
         existing_item = cursor.fetchone()
 
         if existing_item:
-            adjusted_quantity = existing_item[3] + self.quantity
+            adjusted_quantity = existing_item.quantity + self.quantity
             cursor.execute('''
                 UPDATE inventory
                 SET quantity = ?
                 WHERE name = ? AND department = ? AND expiry_date = ?
             ''', (adjusted_quantity, self.name, self.department, self.expiry_date))
             conn.commit()
-            print(f"Item '{self.name}' with expiry date '{self.expiry_date}' already exists in '{self.department}' department. Quantity updated.")
+            if verbose:
+                print(f"Item '{self.name}' with expiry date '{self.expiry_date}' already exists in '{self.department}' department. Quantity updated.")
         else:
             cursor.execute('''
                 INSERT INTO inventory (name, department, quantity, expiry_date)
                 VALUES (?, ?, ?, ?)
             ''', (self.name, self.department, self.quantity, self.expiry_date))
             conn.commit()
-            print(f"Item '{self.name}' added to inventory.")
+            if verbose:
+                print(f"Item '{self.name}' added to inventory.")
+
+# Trigramm-Index für die unscharfe Suche nach Namen und die Erkennung von Duplikaten
+class TrigramIndex:
+    def __init__(self, names=()):
+        self.postings = defaultdict(set)  # trigram -> names containing it
+        self.trigrams = {}  # name -> its trigrams
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name):
+        return name in self.trigrams
+
+    def __len__(self):
+        return len(self.trigrams)
+
+    @staticmethod
+    def normalize(name):
+        return " ".join(name.lower().split())
+
+    @classmethod
+    def trigrams_of(cls, name):
+        # Pad the name so that word beginnings and endings get their own trigrams
+        padded = f"  {cls.normalize(name)} "
+        return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    def add(self, name):
+        if name in self.trigrams:
+            return
+        trigrams = self.trigrams_of(name)
+        self.trigrams[name] = trigrams
+        for trigram in trigrams:
+            self.postings[trigram].add(name)
+
+    def discard(self, name):
+        trigrams = self.trigrams.pop(name, None)
+        if trigrams is None:
+            return
+        for trigram in trigrams:
+            self.postings[trigram].discard(name)
+            if not self.postings[trigram]:
+                del self.postings[trigram]
+
+    def search(self, query, k=5, min_score=0.3):
+        # Top-k names by Jaccard similarity of their trigrams, only names sharing a trigram are scored
+        query_trigrams = self.trigrams_of(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        scored = []
+        for name, count in shared.items():
+            score = count / (len(query_trigrams) + len(self.trigrams[name]) - count)
+            if score >= min_score:
+                scored.append((score, name))
+        return [(name, score) for score, name in heapq.nlargest(k, scored)]
+
+    def similar_names(self, name, k=3, min_score=0.5):
+        # "Did you mean an existing item?" - empty if the name already exists exactly
+        if name in self.trigrams:
+            return []
+        return self.search(name, k, min_score)
+
+    def duplicate_pairs(self, min_score=0.6):
+        # All pairs of names with a similarity of at least min_score. Uses prefix filtering: with the trigrams
+        # of every name sorted from rarest to most common, two similar names must share a trigram within
+        # the first len - ceil(min_score * len) + 1 trigrams, so only those are indexed and probed.
+        frequency = {trigram: len(names) for trigram, names in self.postings.items()}
+        prefix_index = defaultdict(list)
+        pairs = []
+        for name in sorted(self.trigrams, key=lambda n: len(self.trigrams[n])):
+            trigrams = self.trigrams[name]
+            ordered = sorted(trigrams, key=lambda t: (frequency[t], t))
+            prefix = ordered[:len(ordered) - math.ceil(min_score * len(ordered)) + 1]
+            candidates = set()
+            for trigram in prefix:
+                candidates.update(prefix_index[trigram])
+            for other in candidates:
+                other_trigrams = self.trigrams[other]
+                count = len(trigrams & other_trigrams)
+                score = count / (len(trigrams) + len(other_trigrams) - count)
+                if score >= min_score:
+                    pairs.append((other, name, score))
+            for trigram in prefix:
+                prefix_index[trigram].append(name)
+        return sorted(pairs, key=lambda pair: pair[2], reverse=True)
 
 # Datenbankmanager für die Interaktion mit SQLite
 class InventoryDB:
+    ITEM_COLUMNS = "id, name, department, quantity, expiry_date"
+    # SQLite allows a limited number of parameters per query, larger lookups are split into batches
+    LOOKUP_BATCH_SIZE = 500
+    # Quantity snapshots older than this are deleted when a new snapshot is taken
+    SNAPSHOT_RETENTION_DAYS = 365
+
     def __init__(self, db_name="inventory.db"):
         self.conn = sqlite3.connect(db_name)
+        self._name_index = None
+        self._name_index_seq = None
         self.create_table()
 
     def create_table(self):
@@ -121,33 +331,66 @@ class InventoryDB:
                 expiry_date TEXT
             )
         ''')
+        # Change feed: every insert, update and delete gets a monotonically increasing sequence number
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS inventory_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                operation TEXT NOT NULL
+            )
+        ''')
+        for operation, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS inventory_after_{operation.lower()}
+                AFTER {operation} ON inventory
+                BEGIN
+                    INSERT INTO inventory_changes (item_id, operation) VALUES ({row}.id, '{operation.lower()}');
+                END
+            ''')
+        # Periodic snapshots of the total quantity per item and department, used for restock forecasts
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS inventory_snapshots (
+                id INTEGER PRIMARY KEY,
+                taken_at TEXT NOT NULL,
+                name TEXT NOT NULL,
+                department TEXT NOT NULL,
+                quantity INTEGER NOT NULL
+            )
+        ''')
         self.conn.commit()
 
     def close(self):
         self.conn.close()
 
-    def get_all_items(self):
+    # Cursor that returns InventoryItem records. Only used for lookups and listings, the connection itself
+    # keeps plain tuples so that bulk reads (e.g. pd.read_sql) don't pay for a record object per row
+    def _items_cursor(self):
         cursor = self.conn.cursor()
+        cursor.row_factory = item_row_factory
+        return cursor
+
+    def get_all_items(self):
+        cursor = self._items_cursor()
         cursor.execute('SELECT * FROM inventory')
         return cursor.fetchall()
 
     def filter_by_date(self):
-        cursor = self.conn.cursor()
+        cursor = self._items_cursor()
         cursor.execute('SELECT * FROM inventory WHERE expiry_date IS NOT NULL ORDER BY expiry_date')
         return cursor.fetchall()
 
     def filter_alphabetically(self):
-        cursor = self.conn.cursor()
+        cursor = self._items_cursor()
         cursor.execute('SELECT * FROM inventory ORDER BY name')
         return cursor.fetchall()
 
     def filter_by_department(self, department):
-        cursor = self.conn.cursor()
+        cursor = self._items_cursor()
         cursor.execute('SELECT * FROM inventory WHERE department = ?', (department,))
         return cursor.fetchall()
 
     def search_item(self, search_type, search_value):
-        cursor = self.conn.cursor()
+        cursor = self._items_cursor()
         if search_type == "name":
             cursor.execute('SELECT * FROM inventory WHERE name LIKE ?', ('%' + search_value + '%',))
         elif search_type == "expiry_date":
@@ -158,6 +401,156 @@ class InventoryDB:
             return None
         return cursor.fetchall()
 
+    def get_item(self, item_id):
+        cursor = self._items_cursor()
+        cursor.execute(f'SELECT {self.ITEM_COLUMNS} FROM inventory WHERE id = ?', (item_id,))
+        return cursor.fetchone()
+
+    def get_items(self, item_ids):
+        # Primary-key lookups for many ids at once, returns {id: item} for all ids that exist
+        ids = list(dict.fromkeys(item_ids))
+        items = {}
+        cursor = self._items_cursor()
+        for start in range(0, len(ids), self.LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + self.LOOKUP_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            cursor.execute(f'SELECT {self.ITEM_COLUMNS} FROM inventory WHERE id IN ({placeholders})', batch)
+            for item in cursor.fetchall():
+                items[item.id] = item
+        return items
+
+    def load_batch(self, where="1", params=()):
+        # All items matching the SQL condition in one InventoryBatch, for bulk jobs over many items
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {self.ITEM_COLUMNS} FROM inventory WHERE {where} ORDER BY id', params)
+        batch = InventoryBatch()
+        while rows := cursor.fetchmany(10000):
+            batch.extend(rows)
+        return batch
+
+    def delete_item(self, item_id):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM inventory WHERE id = ?', (item_id,))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def set_quantity(self, item_id, quantity):
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE inventory SET quantity = ? WHERE id = ?', (quantity, item_id))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def read_change_seq(conn):
+        # Only reads sqlite_sequence, so it works on any connection, e.g. a cheap read-only one for polling
+        result = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'inventory_changes'").fetchone()
+        return result[0] if result else 0
+
+    def latest_change_seq(self):
+        return self.read_change_seq(self.conn)
+
+    def changes_since(self, seq):
+        # Returns (latest seq, current rows of all items changed after seq, ids of deleted items),
+        # or None if the caller has to reload everything: the changes since seq were already pruned,
+        # or seq is newer than the database (which was recreated or restored from a backup)
+        latest = self.latest_change_seq()
+        if seq > latest:
+            return None
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT MIN(seq) FROM inventory_changes')
+        oldest = cursor.fetchone()[0]
+        if latest > seq and (oldest is None or oldest > seq + 1):
+            return None
+        cursor.execute('''
+            SELECT changes.item_id, inventory.*
+            FROM (SELECT DISTINCT item_id FROM inventory_changes WHERE seq > ? AND seq <= ?) AS changes
+            LEFT JOIN inventory ON inventory.id = changes.item_id
+        ''', (seq, latest))
+        rows = []
+        deleted_ids = []
+        for item_id, *row in cursor.fetchall():
+            if row[0] is None:
+                deleted_ids.append(item_id)
+            else:
+                rows.append(InventoryItem(*row))
+        return latest, rows, deleted_ids
+
+    def prune_changes(self, keep=10000):
+        # Only keep the most recent changes, sessions that are further behind reload the whole table.
+        # Only writes if there is something to delete, so it is cheap to call regularly
+        cursor = self.conn.cursor()
+        cutoff = self.latest_change_seq() - keep
+        cursor.execute('SELECT MIN(seq) FROM inventory_changes')
+        oldest = cursor.fetchone()[0]
+        if oldest is None or oldest > cutoff:
+            return
+        cursor.execute('DELETE FROM inventory_changes WHERE seq <= ?', (cutoff,))
+        self.conn.commit()
+
+    def take_snapshot(self, now=None):
+        now = now or datetime.now()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO inventory_snapshots (taken_at, name, department, quantity)
+            SELECT ?, name, department, SUM(quantity) FROM inventory GROUP BY name, department
+        ''', (now.isoformat(timespec="seconds"),))
+        cutoff = now - timedelta(days=self.SNAPSHOT_RETENTION_DAYS)
+        cursor.execute('DELETE FROM inventory_snapshots WHERE taken_at < ?', (cutoff.isoformat(timespec="seconds"),))
+        self.conn.commit()
+
+    def snapshot_due(self, max_age=timedelta(days=1), now=None):
+        # True if there is no snapshot yet or the newest one is older than max_age
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT MAX(taken_at) FROM inventory_snapshots')
+        latest = cursor.fetchone()[0]
+        return latest is None or datetime.fromisoformat(latest) <= (now or datetime.now()) - max_age
+
+    def latest_snapshot_id(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT MAX(id) FROM inventory_snapshots')
+        return cursor.fetchone()[0] or 0
+
+    def get_snapshots(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT taken_at, name, department, quantity FROM inventory_snapshots')
+        return cursor.fetchall()
+
+    def get_quantities(self):
+        # Current total quantity per item name and department
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT name, department, SUM(quantity) FROM inventory GROUP BY name, department')
+        return cursor.fetchall()
+
+    # Index over all distinct item names. Built on first use and rebuilt whenever the change feed moved,
+    # so it also contains the names written by other processes (dashboard, service, another CLI)
+    @property
+    def name_index(self):
+        seq = self.latest_change_seq()  # Read before the names, like every other reader of the change feed
+        if self._name_index is None or seq != self._name_index_seq:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT DISTINCT name FROM inventory')
+            self._name_index = TrigramIndex(row[0] for row in cursor.fetchall())
+            self._name_index_seq = seq
+        return self._name_index
+
+    def add_item(self, item, verbose=True):
+        item.create_item(self.conn, verbose)
+
+    def rename_item(self, item_id, new_name):
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE inventory SET name = ? WHERE id = ?', (new_name, item_id))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def fuzzy_search(self, search_value, k=5, min_score=0.3):
+        return self.name_index.search(search_value, k, min_score)
+
+    def find_similar_names(self, name, k=3, min_score=0.5):
+        return self.name_index.similar_names(name, k, min_score)
+
+    def duplicate_report(self, min_score=0.6):
+        return self.name_index.duplicate_pairs(min_score)
+
 
 
 # Interaktive Steuerung
@@ -183,12 +576,24 @@ class StorageInteractive:
             print("6. Search for an item.")
             print("7. Delete an item.")
             print("8. Adjust item quantity.")
-            print("9. Exit")
+            print("9. Find possible duplicates.")
+            print("10. Show restock suggestions.")
+            print("11. Exit")
 
-            user_choice = input("Please choose an option (1-9): ")
+            user_choice = input("Please choose an option (1-11): ")
 
             if user_choice == "1":
                 name = input("Enter the name of the item: ")
+
+                # Offer existing items with a similar name to avoid duplicates like "Beer crate" / "beer crates"
+                similar_names = self.db.find_similar_names(name)
+                if similar_names:
+                    print("Did you mean an existing item?")
+                    for number, (similar_name, _) in enumerate(similar_names, start=1):
+                        print(f"{number}. {similar_name}")
+                    choice = input(f"Enter a number to use that name, or press Enter to keep '{name}': ")
+                    if choice.isdigit() and 1 <= int(choice) <= len(similar_names):
+                        name = similar_names[int(choice) - 1][0]
                 
                 # Ask the user until a valid department is provided
                 while True:
@@ -223,7 +628,7 @@ class StorageInteractive:
                 else:
                     item = Inventory(name, department, quantity)
 
-                item.create_item(self.db.conn)
+                self.db.add_item(item)
                 print(f"Item '{name}' added to the inventory.")
 
 
@@ -268,7 +673,7 @@ class StorageInteractive:
 
                         if search_value in Inventory.VALID_DEPARTMENTS:
                             # Filtere nur die Treffer mit dem gesuchten Department
-                            items = [item for item in items if item[2] == search_value]
+                            items = [item for item in items if item.department == search_value]
                             if items:
                                 print("\nItems filtered by department:")
                                 for item in items:
@@ -285,7 +690,7 @@ class StorageInteractive:
 
                         # Fall 1: Suche nach Items ohne Ablaufdatum
                         if search_value.lower() == 'none':
-                            items = [item for item in items if item[4] is None]
+                            items = [item for item in items if item.expiry_date is None]
                             if items:
                                 print("\nItems without expiry date:")
                                 for item in items:
@@ -294,7 +699,7 @@ class StorageInteractive:
                                 print("No items found without an expiry date.")
                         # Fall 2: Suche nach Items mit einem bestimmten Ablaufdatum
                         else:
-                            items = [item for item in items if item[4] == search_value]
+                            items = [item for item in items if item.expiry_date == search_value]
                             if items:
                                 print(f"\nItems expiring on {search_value}:")
                                 for item in items:
@@ -304,6 +709,9 @@ class StorageInteractive:
 
                 else:
                     print("No items found with the specified name.")
+                    suggestions = self.db.fuzzy_search(search_value)
+                    if suggestions:
+                        print(f"Did you mean: {', '.join(name for name, _ in suggestions)}?")
 
             elif user_choice == "7":
                 # ID des zu löschenden Items abfragen
@@ -314,17 +722,14 @@ class StorageInteractive:
                     continue
 
                 # Item mit dieser ID anzeigen
-                cursor = self.db.conn.cursor()
-                cursor.execute('SELECT * FROM inventory WHERE id = ?', (item_id,))
-                item_data = cursor.fetchone()
+                item_data = self.db.get_item(item_id)
 
                 if item_data:
-                    print(f"Item to delete: ID: {item_data[0]}, Name: {item_data[1]}, Department: {item_data[2]}, Quantity: {item_data[3]}, Expiry Date: {item_data[4]}")
+                    print(f"Item to delete: ID: {item_data.id}, Name: {item_data.name}, Department: {item_data.department}, Quantity: {item_data.quantity}, Expiry Date: {item_data.expiry_date}")
                     confirm = input("Do you really want to delete this item? (y/n): ").lower()
 
                     if confirm == "y":
-                        cursor.execute('DELETE FROM inventory WHERE id = ?', (item_id,))
-                        self.db.conn.commit()
+                        self.db.delete_item(item_id)
                         print(f"Item with ID {item_id} successfully deleted.")
                     else:
                         print("Deletion cancelled.")
@@ -340,12 +745,10 @@ class StorageInteractive:
                     continue
 
                 # Item mit dieser ID anzeigen
-                cursor = self.db.conn.cursor()
-                cursor.execute('SELECT * FROM inventory WHERE id = ?', (item_id,))
-                item_data = cursor.fetchone()
+                item_data = self.db.get_item(item_id)
 
                 if item_data:
-                    print(f"Item to update: ID: {item_data[0]}, Name: {item_data[1]}, Department: {item_data[2]}, Quantity: {item_data[3]}, Expiry Date: {item_data[4]}")
+                    print(f"Item to update: ID: {item_data.id}, Name: {item_data.name}, Department: {item_data.department}, Quantity: {item_data.quantity}, Expiry Date: {item_data.expiry_date}")
                     confirm = input("Do you want to update the quantity of this item? (y/n): ").lower()
 
                     if confirm == "y":
@@ -357,12 +760,11 @@ class StorageInteractive:
                                 print("Only numbers can be entered. Please try again.")
 
                         # Neue Überprüfung: Verhindern, dass die Menge negativ wird
-                        if quantity_adjustment < 0 and abs(quantity_adjustment) > item_data[3]:
+                        if quantity_adjustment < 0 and abs(quantity_adjustment) > item_data.quantity:
                             print("Removing more units than exist is not possible. No changes have been made.")
                         else:
-                            new_quantity = max(0, item_data[3] + quantity_adjustment)
-                            cursor.execute('UPDATE inventory SET quantity = ? WHERE id = ?', (new_quantity, item_id))
-                            self.db.conn.commit()
+                            new_quantity = max(0, item_data.quantity + quantity_adjustment)
+                            self.db.set_quantity(item_id, new_quantity)
                             print(f"Item with ID {item_id} quantity updated to {new_quantity}.")
                     else:
                         print("Quantity update cancelled.")
@@ -372,6 +774,30 @@ class StorageInteractive:
 
 
             elif user_choice == "9":
+                pairs = self.db.duplicate_report()
+                if pairs:
+                    print("\nPossible duplicates (similarity):")
+                    for name_a, name_b, score in pairs:
+                        print(f"'{name_a}' / '{name_b}' ({score:.0%})")
+                else:
+                    print("No possible duplicates found.")
+
+            elif user_choice == "10":
+                # Imported here, so the CLI doesn't load pandas unless the report is requested
+                from InventoryForecast import format_report, forecast_report
+
+                # Viewing the report only records a snapshot if the daily one (python InventoryForecast.py snapshot)
+                # hasn't run, otherwise every view would add a full set of rows to the history
+                if self.db.snapshot_due():
+                    self.db.take_snapshot()
+                report = forecast_report(self.db)
+                if report.empty:
+                    print("No items in the inventory.")
+                else:
+                    print("\nRestock suggestions (items to reorder first):")
+                    print(format_report(report))
+
+            elif user_choice == "11":
                 break
             else:
                 print("Invalid option. Please try again.")
@@ -381,6 +807,7 @@ class StorageInteractive:
 
 if __name__ == "__main__":
     db = InventoryDB()
+    db.prune_changes()
     interactive_storage = StorageInteractive(db)
     interactive_storage.interact()
     db.close()
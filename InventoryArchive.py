@@ -0,0 +1,119 @@
+# Archive for depleted and expired items
+#
+# Rows with quantity 0, or with an expiry date more than EXPIRED_DAYS days in the past, are moved out
+# of the inventory table into Parquet files, partitioned by the month they were archived in and by department:
+#   archive/month=2026-10/department=ClubA/part-20261019-101500-123456.parquet
+# The inventory table then only holds active stock. read_archive() reads the files back for audits and
+# only opens the partitions that match the requested months and departments.
+#
+# Run with: python InventoryArchive.py archive [--expired-days 30]
+#           python InventoryArchive.py read [--from-month 2026-01] [--to-month 2026-12] [--department ClubA] [--name beer]
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from InventoryApp import InventoryDB, InventoryItem
+
+ARCHIVE_DIR = os.environ.get("INVENTORY_ARCHIVE_DIR", "archive")
+EXPIRED_DAYS = 30
+ARCHIVE_COLUMNS = list(InventoryItem._fields) + ["archived_at"]
+
+
+def archive_inactive(db, archive_dir=ARCHIVE_DIR, expired_days=EXPIRED_DAYS, now=None):
+    # Moves depleted and long expired items to the archive and returns the number of archived items.
+    # The rows are deleted in the same transaction that is only committed once all files are written.
+    now = now or datetime.now()
+    cutoff = (now.date() - timedelta(days=expired_days)).isoformat()
+    month = now.strftime("%Y-%m")
+    conn = db.conn
+    cursor = conn.cursor()
+    written = []
+    cursor.execute("BEGIN IMMEDIATE")  # No other writer can change the rows until they are archived
+    try:
+        batch = db.load_batch("quantity = 0 OR (expiry_date IS NOT NULL AND expiry_date < ?)", (cutoff,))
+        if not batch:
+            conn.rollback()
+            return 0
+        archived = pd.DataFrame(batch.columns())
+        archived["archived_at"] = now.isoformat(timespec="seconds")
+        cursor.executemany('DELETE FROM inventory WHERE id = ?', ((item_id,) for item_id in batch.ids))
+        for department, part in archived.groupby("department"):
+            partition = os.path.join(archive_dir, f"month={month}", f"department={department}")
+            os.makedirs(partition, exist_ok=True)
+            path = os.path.join(partition, f"part-{now:%Y%m%d-%H%M%S-%f}.parquet")
+            part.to_parquet(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+            written.append(path)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        for path in written:
+            os.remove(path)
+        raise
+    return len(batch)
+
+
+def archive_partitions(archive_dir=ARCHIVE_DIR, from_month=None, to_month=None, departments=None):
+    # Directories of all partitions matching the filter, without opening any file
+    partitions = []
+    if not os.path.isdir(archive_dir):
+        return partitions
+    for month_entry in sorted(os.scandir(archive_dir), key=lambda entry: entry.name):
+        if not month_entry.is_dir() or not month_entry.name.startswith("month="):
+            continue
+        month = month_entry.name[len("month="):]
+        if (from_month and month < from_month) or (to_month and month > to_month):
+            continue
+        for department_entry in sorted(os.scandir(month_entry.path), key=lambda entry: entry.name):
+            if not department_entry.is_dir() or not department_entry.name.startswith("department="):
+                continue
+            department = department_entry.name[len("department="):]
+            if departments and department not in departments:
+                continue
+            partitions.append((month, department, department_entry.path))
+    return partitions
+
+
+def read_archive(archive_dir=ARCHIVE_DIR, from_month=None, to_month=None, departments=None, name=None):
+    # Archived items as a data frame. Months are given as "YYYY-MM" (inclusive), name is matched like the CLI search
+    frames = []
+    for month, department, path in archive_partitions(archive_dir, from_month, to_month, departments):
+        for file_name in sorted(os.listdir(path)):
+            if file_name.endswith(".parquet"):
+                frame = pd.read_parquet(os.path.join(path, file_name))
+                frame["month"] = month
+                frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS + ["month"])
+    archived = pd.concat(frames, ignore_index=True)
+    if name:
+        archived = archived[archived["name"].str.contains(name, case=False, regex=False)]
+    return archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive depleted and expired items or read the archive.")
+    parser.add_argument("--db", default="inventory.db")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive_command = commands.add_parser("archive", help="move depleted and expired items to the archive")
+    archive_command.add_argument("--expired-days", type=int, default=EXPIRED_DAYS,
+                                 help="archive perishables that expired more than this many days ago")
+    read_command = commands.add_parser("read", help="show archived items")
+    read_command.add_argument("--from-month", help="first month (YYYY-MM)")
+    read_command.add_argument("--to-month", help="last month (YYYY-MM)")
+    read_command.add_argument("--department", action="append", help="department, can be given more than once")
+    read_command.add_argument("--name", help="part of the item name")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        db = InventoryDB(args.db)
+        count = archive_inactive(db, args.archive_dir, args.expired_days)
+        db.close()
+        print(f"{count} items archived.")
+    else:
+        archived = read_archive(args.archive_dir, args.from_month, args.to_month, args.department, args.name)
+        print(archived.to_string(index=False) if not archived.empty else "No archived items found.")
@@ -0,0 +1,179 @@
+# Charts for the "Inventory Insights" section of the Streamlit dashboard
+#
+# The charts only depend on the inventory data frame, so they can be rendered inline in the
+# Streamlit script or ahead of time by the chart worker (ChartWorker.py), which stores them as
+# PNG images per data version in CHART_DIR.
+
+import io
+import os
+from datetime import timedelta
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+CHART_DIR = os.environ.get("INVENTORY_CHART_DIR", "chart_cache")
+
+# Define & assign colors for each department
+DEPARTMENT_COLORS = {
+    'General': '#98FB98',  # Sanftes Grün
+    'ClubA': '#ADD8E6',    # Helles Blau
+    'ClubB': '#D8BFD8',    # Sanftes Lila
+    'ClubC': '#FFB6C1'     # Sanftes Rosa-Rot
+}
+DEPARTMENT_ORDER = ['General', 'ClubA', 'ClubB', 'ClubC']
+
+# The checkboxes and sort options of the dashboard only ever show one of these subsets of the inventory
+VARIANTS = ["all", "non_perishables", "perishables"]
+
+
+def select_variant(df, variant):
+    if variant == "non_perishables":
+        return df[df['expiry_date'].isnull()]
+    if variant == "perishables":
+        return df[df['expiry_date'].notnull()]
+    return df
+
+
+def expiry_frame(df, today):
+    # Data frame sorted by expiry date (non-perishables first) with a color for every item,
+    # used by the expiry pie chart and the "Next items to expire" table
+    df_piechart2 = df.copy()
+    df_piechart2['expiry_date'] = pd.to_datetime(df_piechart2['expiry_date'], errors='coerce').dt.date  # Nur das Datum verwenden
+    df_piechart2 = df_piechart2.sort_values(by=['expiry_date'], ascending=[False])
+    df_piechart2 = pd.concat([df_piechart2[df_piechart2['expiry_date'].isna()], df_piechart2.dropna(subset=['expiry_date'])])
+    thirty_days_from_now = today + timedelta(days=30)
+
+    # Define & assign colours for items
+    def get_color(expiry_date):
+        if pd.isna(expiry_date):
+            return '#98FB98'  # Green for non-perishables
+        elif expiry_date <= thirty_days_from_now:
+            return '#FF6347'  # Red for perishables expiring within 30 days
+        else:
+            return '#FFA500'  # Orange for other perishables
+    df_piechart2['color'] = df_piechart2['expiry_date'].apply(get_color)
+    return df_piechart2
+
+
+def department_share_chart(df, today):
+    # Pie chart for showing department share of inventory, sorted by department
+    df_piechart = df.copy()
+    df_piechart['department'] = pd.Categorical(df_piechart['department'], categories=DEPARTMENT_ORDER, ordered=True)
+    df_piechart = df_piechart.sort_values('department')
+    # Calculate total sum of quantity of all items
+    total_quantity = df_piechart['quantity'].sum()
+    item_colors = [DEPARTMENT_COLORS[dept] for dept in df_piechart['department']]
+    # Calculate the percentage for each department
+    department_totals = df_piechart.groupby('department', observed=False)['quantity'].sum()
+    percentages = (department_totals / total_quantity) * 100
+    # Create pie chart
+    fig, ax = plt.subplots(figsize=(10, 10))
+    ax.pie(df_piechart['quantity'], labels=None, colors=item_colors, autopct=None, startangle=90, counterclock=False,
+        wedgeprops={'edgecolor': 'grey', 'linewidth': 0.3})
+    # Define labels for the legend with percentages
+    legend_labels = [f'{dept}: {percentages[dept]:.1f}%' for dept in DEPARTMENT_COLORS.keys()]
+    # Create legend
+    handles = [plt.Rectangle((0, 0), 1, 1, color=DEPARTMENT_COLORS[dept]) for dept in DEPARTMENT_COLORS.keys()]
+    ax.set_title("Share of Quantity by Department", fontsize=20, fontweight='bold')
+    ax.legend(handles, legend_labels, title="Departments", loc="upper right", frameon=False)
+    ax.axis('equal')
+    return fig
+
+
+def expiry_status_chart(df, today):
+    # Pie chart for showing relation of perishables and non-perishables
+    df_piechart2 = expiry_frame(df, today)
+    # Calculate the total quantity for each color category
+    non_perishables_count = sum(df_piechart2['color'] == '#98FB98')
+    perishables_count = sum(df_piechart2['color'] == '#FFA500')
+    expiring_soon_count = sum(df_piechart2['color'] == '#FF6347')
+    total_count = len(df_piechart2)
+    # Calculate percentages
+    non_perishables_pct = (non_perishables_count / total_count) * 100
+    perishables_pct = (perishables_count / total_count) * 100
+    expiring_soon_pct = (expiring_soon_count / total_count) * 100
+    # Create pie chart
+    fig, ax = plt.subplots(figsize=(10, 10))
+    ax.pie([1] * len(df_piechart2), labels=None, colors=df_piechart2['color'], startangle=90, counterclock=False, wedgeprops={'edgecolor': 'grey', 'linewidth': 0.5})
+    # Define labels for the legend with percentages
+    legend_labels = [
+        f'Non-perish.: {non_perishables_pct:.1f}%',
+        f'Perish.: {perishables_pct:.1f}%',
+        f'Exp. 30 d.: {expiring_soon_pct:.1f}%'
+    ]
+    legend_colors = ['#98FB98', '#FFA500', '#FF6347']
+    # Create legend
+    handles = [plt.Rectangle((0, 0), 1, 1, color=color) for color in legend_colors]
+    ax.set_title("Items by Expiry Date", fontsize=20, fontweight='bold')
+    ax.legend(handles, legend_labels, title="Expiry Status", loc="upper right", frameon=False)
+    ax.axis('equal')  # Make sure pie is drawn as a circle
+    return fig
+
+
+def quantity_by_item_chart(df, today):
+    # Bar chart for showing total quantity of unique items, show departments:
+    # calculate total quantity of items with same name, group by name and department (in the defined order of departments)
+    df_barchart = df.copy()
+    df_barchart['department'] = pd.Categorical(df_barchart['department'], categories=DEPARTMENT_ORDER, ordered=True)
+    df_barchart = df_barchart.groupby(['name', 'department'], as_index=False, observed=True)['quantity'].sum()
+    total_quantities = df_barchart.groupby('name')['quantity'].sum().reset_index()
+    total_quantities = total_quantities.sort_values(by='quantity', ascending=True)
+    df_barchart['color'] = df_barchart['department'].astype(str).map(DEPARTMENT_COLORS)
+    # Create bar chart
+    fig, ax = plt.subplots(figsize=(7, 8))
+    # Remove margines ("box" around chart)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+    # Initialize a dictionary for saving total quantity of every item
+    cumulative_quantity = {name: 0 for name in total_quantities['name']}
+    # For every name, stack the bars in the defined colours based on the defined order of departments
+    for name in total_quantities['name']:
+        item_data = df_barchart[df_barchart['name'] == name]
+        for _, row in item_data.iterrows():
+            ax.barh(name, row['quantity'], left=cumulative_quantity[name], color=row['color'])
+            cumulative_quantity[name] += row['quantity']
+    # Define no labeling on axes
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+    ax.set_title('Items by total Quantity and Department', fontsize=18, fontweight='bold')
+    return fig
+
+
+CHARTS = {
+    "department_share": department_share_chart,
+    "expiry_status": expiry_status_chart,
+    "quantity_by_item": quantity_by_item_chart,
+}
+
+
+def render_chart(chart, df, today):
+    return CHARTS[chart](df, today)
+
+
+def render_png(chart, df, today):
+    # Renders a chart to PNG bytes, with the same settings st.pyplot uses
+    fig = render_chart(chart, df, today)
+    image = io.BytesIO()
+    fig.savefig(image, format="png", bbox_inches="tight", dpi=200)
+    plt.close(fig)
+    return image.getvalue()
+
+
+def chart_version(seq, today):
+    # The expiry chart depends on today's date, so images are keyed by change sequence and date
+    return f"{seq}-{today.isoformat()}"
+
+
+def chart_path(version, variant, chart, chart_dir=CHART_DIR):
+    return os.path.join(chart_dir, version, variant, f"{chart}.png")
+
+
+def load_chart(version, variant, chart, chart_dir=CHART_DIR):
+    # Returns the pre-rendered image, or None if the worker hasn't rendered this version (yet)
+    try:
+        with open(chart_path(version, variant, chart, chart_dir), "rb") as image:
+            return image.read()
+    except OSError:
+        return None
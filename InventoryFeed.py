@@ -0,0 +1,34 @@
+# Keeps a pandas copy of the inventory table up to date from the change feed
+#
+# The dashboard reads the whole table once per session; afterwards only the rows changed since the last
+# script run are loaded (see InventoryDB.changes_since) and applied to the cached data frame.
+
+import pandas as pd
+
+
+def load_inventory_frame(db):
+    # Returns (change seq, data frame). The sequence number is read before the data, so newer changes
+    # are never stored under an older sequence number
+    seq = db.latest_change_seq()
+    return seq, pd.read_sql("SELECT * FROM inventory", db.conn)
+
+
+def apply_changes(items_df, rows, deleted_ids):
+    # Applies changed and deleted rows from the change feed to a cached data frame
+    if not rows and not deleted_ids:
+        return items_df
+    changed = pd.DataFrame(rows, columns=items_df.columns)
+    items_df = items_df[~items_df['id'].isin(set(deleted_ids) | set(changed['id']))]
+    items_df = pd.concat([items_df, changed], ignore_index=True).sort_values(by='id', ignore_index=True)
+    # The frame of an empty table has object columns only, use the real types once there are rows
+    return items_df.infer_objects()
+
+
+def refresh_inventory_frame(db, items_df=None, seq=None):
+    # Returns (change seq, data frame) for the current data, reloads everything if there is no
+    # cached frame yet or the feed can't bring it up to date
+    changes = None if items_df is None else db.changes_since(seq)
+    if changes is None:
+        return load_inventory_frame(db)
+    latest, rows, deleted_ids = changes
+    return latest, apply_changes(items_df, rows, deleted_ids)
@@ -0,0 +1,106 @@
+# Restock forecasting for the SHSG inventory
+#
+# Computes for every (name, department) how much is used per day, how many days the current stock
+# lasts and whether (and how much) to reorder, for the whole catalog in one pandas/NumPy pass.
+# Consumption is taken from the quantity snapshots in the inventory_snapshots table (see
+# InventoryDB.take_snapshot): every decrease between two snapshots counts as consumption, increases are restocks.
+# Results are cached per data version, so the dashboard section loads instantly.
+#
+# Take a snapshot (e.g. daily from cron): python InventoryForecast.py snapshot
+# Show the report:                        python InventoryForecast.py report
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+LEAD_TIME_DAYS = 7  # Days between ordering and having the items in stock
+SAFETY_DAYS = 3  # Extra days of stock to keep for unexpected demand
+TARGET_DAYS = 30  # Days of stock a reorder should cover
+
+KEYS = ["name", "department"]
+REPORT_COLUMNS = ["quantity", "daily_consumption", "days_left", "reorder_point", "reorder", "suggested_order", "snapshots"]
+
+# Only the report of the newest data version is kept
+_cache = {}
+
+
+def compute_forecast(snapshots, current, lead_time_days=LEAD_TIME_DAYS, safety_days=SAFETY_DAYS, target_days=TARGET_DAYS):
+    # snapshots: data frame with taken_at, name, department, quantity (one row per snapshot and item)
+    # current: data frame with name, department, quantity (the current stock)
+    # Items that only appear in the snapshots (archived or removed) are reported with a current stock of 0
+    current = current.groupby(KEYS)["quantity"].sum().to_frame()
+    if snapshots.empty:
+        stats = pd.DataFrame(columns=["daily_consumption", "snapshots"], index=current.index)
+    else:
+        history = snapshots.assign(taken_at=pd.to_datetime(snapshots["taken_at"])).sort_values(KEYS + ["taken_at"])
+        # Decreases between consecutive snapshots of the same item are consumption, increases are restocks
+        history["consumed"] = (-history.groupby(KEYS, sort=False)["quantity"].diff()).clip(lower=0).fillna(0)
+        stats = history.groupby(KEYS).agg(
+            consumed=("consumed", "sum"),
+            first=("taken_at", "min"),
+            last=("taken_at", "max"),
+            snapshots=("quantity", "size"),
+        )
+        span_days = (stats["last"] - stats["first"]).dt.total_seconds() / 86400
+        stats["daily_consumption"] = stats["consumed"] / span_days.where(span_days > 0)
+    report = current.join(stats[["daily_consumption", "snapshots"]], how="outer")
+    report["quantity"] = report["quantity"].fillna(0).astype(int)
+    rate = report["daily_consumption"].astype(float).to_numpy()
+    quantity = report["quantity"].to_numpy(dtype=float)
+    report["snapshots"] = report["snapshots"].fillna(0).astype(int)
+    # Items without consumption last forever, items without history can't be forecast (NaN)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        report["days_left"] = np.where(rate > 0, quantity / rate, np.where(rate == 0, np.inf, np.nan))
+    report["reorder_point"] = rate * (lead_time_days + safety_days)
+    report["reorder"] = (rate > 0) & (quantity <= report["reorder_point"].to_numpy())
+    order = np.ceil(np.clip(rate * (lead_time_days + target_days) - quantity, 0, None))
+    report["suggested_order"] = np.where(report["reorder"].to_numpy(), np.nan_to_num(order), 0).astype(int)
+    report = report.reset_index().sort_values(by=["reorder", "days_left", "name"], ascending=[False, True, True])
+    return report[KEYS + REPORT_COLUMNS].reset_index(drop=True)
+
+
+def forecast_report(db, lead_time_days=LEAD_TIME_DAYS, safety_days=SAFETY_DAYS, target_days=TARGET_DAYS):
+    # The report for the current data, only recomputed when the inventory or the snapshots changed
+    version = (db.latest_change_seq(), db.latest_snapshot_id(), lead_time_days, safety_days, target_days)
+    report = _cache.get(version)
+    if report is None:
+        snapshots = pd.DataFrame(db.get_snapshots(), columns=["taken_at"] + KEYS + ["quantity"])
+        current = pd.DataFrame(db.get_quantities(), columns=KEYS + ["quantity"])
+        report = compute_forecast(snapshots, current, lead_time_days, safety_days, target_days)
+        _cache.clear()
+        _cache[version] = report
+    return report.copy()
+
+
+def format_report(report):
+    # Text table for the CLI
+    table = report.copy()
+    table["daily_consumption"] = table["daily_consumption"].map(lambda rate: "-" if pd.isna(rate) else f"{rate:.2f}")
+    table["days_left"] = table["days_left"].map(
+        lambda days: "-" if pd.isna(days) else ("never empty" if np.isinf(days) else f"{days:.0f}"))
+    table["reorder_point"] = table["reorder_point"].map(lambda point: "-" if pd.isna(point) else f"{point:.0f}")
+    table["reorder"] = table["reorder"].map({True: "yes", False: ""})
+    return table.to_string(index=False)
+
+
+if __name__ == "__main__":
+    from InventoryApp import InventoryDB
+
+    parser = argparse.ArgumentParser(description="Restock forecasts for the inventory.")
+    parser.add_argument("--db", default="inventory.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("snapshot", help="record the current quantities")
+    report_command = commands.add_parser("report", help="show days of stock left and reorder suggestions")
+    report_command.add_argument("--lead-time-days", type=float, default=LEAD_TIME_DAYS)
+    report_command.add_argument("--safety-days", type=float, default=SAFETY_DAYS)
+    report_command.add_argument("--target-days", type=float, default=TARGET_DAYS)
+    args = parser.parse_args()
+
+    db = InventoryDB(args.db)
+    if args.command == "snapshot":
+        db.take_snapshot()
+        print("Snapshot saved.")
+    else:
+        print(format_report(forecast_report(db, args.lead_time_days, args.safety_days, args.target_days)))
+    db.close()
@@ -0,0 +1,312 @@
+# Load generator for the SHSG inventory database
+#
+# Simulates concurrent clients against a local database file: writers run the CLI code paths
+# (Inventory.create_item / update_quantity / remove_item), readers run the dashboard read path
+# of StInventoryApp.py. Reports throughput, latency percentiles, lock waits and SQLITE_BUSY counts
+# so that different configurations can be compared with real numbers:
+#   --journal-mode / --synchronous  SQLite settings of every connection
+#   --connections                   one connection per client (reuse) or a new one per operation
+#   --batch-size                    write operations per commit (latency is counted until the commit)
+#   --write-path                    writers use the database directly or send their operations to
+#                                   InventoryService, which commits them in groups
+#
+# Example: python InventoryLoadTest.py --writers 8 --readers 4 --duration 20 --journal-mode wal --batch-size 16
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from InventoryApp import Inventory, InventoryDB, InventoryPerishable
+from InventoryService import GroupCommitConnection, InventoryClient, InventoryService, InventoryServiceError
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+OPERATIONS = ["create", "update", "remove", "read"]
+# Share of each write operation for writer clients
+WRITE_MIX = [("create", 0.5), ("update", 0.35), ("remove", 0.15)]
+# Most operations per group commit of the service if --batch-size isn't given
+SERVICE_BATCH_SIZE = 256
+
+
+def is_busy_error(error):
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code in (SQLITE_BUSY, SQLITE_LOCKED)
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def open_connection(config):
+    conn = sqlite3.connect(config["db"], timeout=config["busy_timeout"])
+    # Only wal is stored in the database file, the other journal modes have to be set on every connection
+    conn.execute(f"PRAGMA journal_mode = {config['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {config['synchronous']}")
+    # Make SQLITE_BUSY surface immediately, so that waiting for locks is done (and measured) by us
+    conn.execute("PRAGMA busy_timeout = 0")
+    return conn
+
+
+def prepare_database(config):
+    # The test seeds and changes rows, so it never runs against an existing (real) inventory
+    if os.path.exists(config["db"]):
+        raise FileExistsError(f"{config['db']} already exists, the load test needs a new database file")
+    db = InventoryDB(config["db"])
+    db.conn.execute(f"PRAGMA journal_mode = {config['journal_mode']}")
+    rng = random.Random(config["seed"])
+    for i in range(config["items"]):
+        name = f"Item {i % config['names']}"
+        department = Inventory.VALID_DEPARTMENTS[i % len(Inventory.VALID_DEPARTMENTS)]
+        if i % 3 == 0:
+            expiry_date = f"2030-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            InventoryPerishable(name, department, rng.randint(1, 50), expiry_date).create_item(db.conn, verbose=False)
+        else:
+            Inventory(name, department, rng.randint(1, 50)).create_item(db.conn, verbose=False)
+    db.close()
+
+
+def random_item(rng, config):
+    name = f"Item {rng.randrange(config['names'])}"
+    department = rng.choice(Inventory.VALID_DEPARTMENTS)
+    return Inventory(name, department, rng.randint(1, 20))
+
+
+def prepare_operation(operation, rng, config):
+    # Returns a function that runs the operation on a connection, so that a retry repeats the same change
+    if operation == "read":
+        # Same query as the dashboard runs on every script run
+        return lambda conn: pd.read_sql("SELECT * FROM inventory", conn)
+    # The messages of the inventory classes would only flood the report
+    item = random_item(rng, config)
+    if operation == "create":
+        return lambda conn: item.create_item(conn, verbose=False)
+    if operation == "update":
+        quantity = rng.randint(-10, 10)
+        return lambda conn: item.update_quantity(conn, quantity, verbose=False)
+    return lambda conn: item.remove_item(conn)
+
+
+def run_batch(conn, actions):
+    # A single operation commits on its own like in the CLI, a batch is committed once at the end
+    if len(actions) == 1:
+        actions[0](conn)
+        return
+    conn.execute("BEGIN IMMEDIATE")  # Take the write lock up front, so a locked batch fails before any work
+    batch_conn = GroupCommitConnection(conn)
+    for action in actions:
+        action(batch_conn)
+    conn.commit()
+
+
+def next_operations(rng, config, is_writer):
+    if not is_writer:
+        return ["read"]
+    operations = [op for op, _ in WRITE_MIX]
+    weights = [weight for _, weight in WRITE_MIX]
+    return rng.choices(operations, weights, k=config["batch_size"])
+
+
+def run_client(config, client_index):
+    # One simulated user: runs operations until the deadline and returns one sample per operation:
+    # (operation, latency, lock wait, busy count, failed)
+    rng = random.Random(config["seed"] * 1000 + client_index)
+    is_writer = client_index < config["writers"]
+    if is_writer and config["write_path"] == "service":
+        return asyncio.run(run_service_writer(config, rng))
+    reuse = config["connections"] == "reuse"
+    conn = open_connection(config) if reuse else None
+    samples = []
+    deadline = time.perf_counter() + config["duration"]
+    while time.perf_counter() < deadline:
+        operations = next_operations(rng, config, is_writer)
+        actions = [prepare_operation(operation, rng, config) for operation in operations]
+        started = time.perf_counter()
+        lock_wait = 0.0
+        busy_count = 0
+        failed = False
+        while True:
+            op_conn = conn
+            try:
+                if op_conn is None:
+                    op_conn = open_connection(config)
+                run_batch(op_conn, actions)
+                break
+            except (sqlite3.OperationalError, pd.io.sql.DatabaseError) as error:
+                if not is_busy_error(error):
+                    raise
+                if op_conn is not None:
+                    op_conn.rollback()
+                busy_count += 1
+                if time.perf_counter() - started >= config["busy_timeout"]:
+                    failed = True
+                    break
+                backoff = config["backoff"] * rng.uniform(0.5, 1.5)
+                time.sleep(backoff)
+                lock_wait += backoff
+            finally:
+                if not reuse and op_conn is not None:
+                    op_conn.close()
+        # Every operation of a batch is only done once the batch is committed. Lock waits are counted once
+        latency = time.perf_counter() - started
+        for i, operation in enumerate(operations):
+            samples.append((operation, latency, lock_wait if i == 0 else 0.0, busy_count if i == 0 else 0, failed))
+    if conn is not None:
+        conn.close()
+    return samples
+
+
+async def run_service_writer(config, rng):
+    # Writer that sends its operations to the inventory service, one at a time like a user would
+    client = await InventoryClient(config["socket"]).connect()
+    operations = [op for op, _ in WRITE_MIX]
+    weights = [weight for _, weight in WRITE_MIX]
+    samples = []
+    deadline = time.perf_counter() + config["duration"]
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        item = random_item(rng, config)
+        if operation == "create":
+            args = {"name": item.name, "department": item.department, "quantity": item.quantity}
+            op = "create_item"
+        elif operation == "update":
+            args = {"name": item.name, "department": item.department, "quantity": rng.randint(-10, 10)}
+            op = "update_quantity"
+        else:
+            args = {"name": item.name, "department": item.department}
+            op = "remove_item"
+        started = time.perf_counter()
+        failed = False
+        try:
+            await client.call(op, **args)
+        except InventoryServiceError:
+            failed = True
+        samples.append((operation, time.perf_counter() - started, 0.0, 0, failed))
+    await client.close()
+    return samples
+
+
+def start_service(config):
+    # Runs the inventory service on its own event loop in a background thread, returns a function that stops it
+    loop = asyncio.new_event_loop()
+    service = InventoryService(config["db"], readers=1, max_batch=config["batch_size"])
+    ready = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(service.start())
+        service.server = loop.run_until_complete(asyncio.start_unix_server(service.handle_client, path=config["socket"]))
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(service.close())
+        loop.close()
+
+    thread = threading.Thread(target=run, name="inventory-service", daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    return stop
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(samples, duration):
+    rows = []
+    for operation in OPERATIONS + ["total"]:
+        selected = [s for s in samples if operation == "total" or s[0] == operation]
+        if not selected:
+            continue
+        latencies = sorted(s[1] for s in selected if not s[4])
+        rows.append({
+            "operation": operation,
+            "ops": len(latencies),
+            "ops/s": len(latencies) / duration,
+            "p50 ms": percentile(latencies, 50) * 1000,
+            "p95 ms": percentile(latencies, 95) * 1000,
+            "p99 ms": percentile(latencies, 99) * 1000,
+            "lock wait s": sum(s[2] for s in selected),
+            "busy": sum(s[3] for s in selected),
+            "failed": sum(1 for s in selected if s[4]),
+        })
+    return pd.DataFrame(rows).set_index("operation")
+
+
+def run_load_test(config):
+    prepare_database(config)
+    clients = config["writers"] + config["readers"]
+    stop_service = start_service(config) if config["write_path"] == "service" else None
+    started = time.perf_counter()
+    try:
+        if config["mode"] == "process":
+            with ProcessPoolExecutor(max_workers=clients) as pool:
+                results = list(pool.map(run_client, [config] * clients, range(clients)))
+        else:
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                results = list(pool.map(run_client, [config] * clients, range(clients)))
+    finally:
+        if stop_service is not None:
+            stop_service()
+    elapsed = time.perf_counter() - started
+    samples = [sample for result in results for sample in result]
+    return summarize(samples, elapsed)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test for the inventory database.")
+    parser.add_argument("--db", help="new database file to create for the test (default: a temporary file)")
+    parser.add_argument("--writers", type=int, default=4, help="number of CLI-like writer clients")
+    parser.add_argument("--readers", type=int, default=4, help="number of dashboard-like reader clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds each client runs")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--journal-mode", default="delete", choices=["delete", "truncate", "persist", "wal", "memory"])
+    parser.add_argument("--synchronous", default="full", choices=["off", "normal", "full", "extra"])
+    parser.add_argument("--connections", choices=["reuse", "per-operation"], default="reuse",
+                        help="keep one connection per client or open a new one for every operation")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"write operations per commit (default: 1), with --write-path service the most "
+                             f"operations per group commit (default: {SERVICE_BATCH_SIZE})")
+    parser.add_argument("--write-path", choices=["direct", "service"], default="direct",
+                        help="writers use the database directly or go through InventoryService")
+    parser.add_argument("--busy-timeout", type=float, default=5.0, help="seconds a client retries a locked operation")
+    parser.add_argument("--backoff", type=float, default=0.005, help="mean seconds to sleep between retries")
+    parser.add_argument("--items", type=int, default=200, help="rows to seed the database with")
+    parser.add_argument("--names", type=int, default=50, help="number of distinct item names")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    if args.db and os.path.exists(args.db):
+        parser.error(f"{args.db} already exists, choose a new file so the real inventory isn't changed")
+    if args.write_path == "service" and args.journal_mode != "wal":
+        parser.error("--write-path service needs --journal-mode wal, the service always uses WAL")
+    if args.batch_size is None:
+        args.batch_size = SERVICE_BATCH_SIZE if args.write_path == "service" else 1
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        config = vars(args)
+        config["db"] = args.db or os.path.join(tmp, "loadtest.db")
+        config["socket"] = os.path.join(tmp, "inventory.sock")
+        report = run_load_test(config)
+        print(f"{args.writers} writers, {args.readers} readers, {args.mode} mode, "
+              f"journal_mode={args.journal_mode}, synchronous={args.synchronous}, connections={args.connections}, "
+              f"write_path={args.write_path}, batch_size={args.batch_size}")
+        print(report.to_string(float_format=lambda value: f"{value:.2f}"))
@@ -0,0 +1,330 @@
+# Local inventory service
+#
+# An asyncio server on a Unix socket that wraps InventoryDB and the Inventory / InventoryPerishable
+# operations, so that the CLI, the dashboard and scripts don't each commit on their own connection.
+# All writes go through one writer task, which collects the queued operations and commits them
+# together (one transaction and one fsync per batch). Reads are served by a pool of reader connections.
+#
+# Protocol: one JSON object per line.
+#   request:  {"id": 1, "op": "create_item", "args": {"name": "Beer", "department": "ClubA", "quantity": 5}}
+#   response: {"id": 1, "ok": true, "result": ...}  or  {"id": 1, "ok": false, "error": "..."}
+#
+# Run with: python InventoryService.py [--db inventory.db] [--socket inventory.sock]
+
+import argparse
+import asyncio
+import contextlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from InventoryApp import Inventory, InventoryDB, InventoryPerishable
+
+
+# Seconds between prunes of the change feed by the writer
+PRUNE_INTERVAL = 60
+
+
+class InventoryServiceError(Exception):
+    pass
+
+
+def _make_item(name, department, quantity=0, expiry_date=None):
+    if expiry_date:
+        return InventoryPerishable(name, department, quantity, expiry_date)
+    return Inventory(name, department, quantity)
+
+
+# The service has no console, so the messages of the inventory classes are switched off
+def _create_item(db, name, department, quantity, expiry_date=None):
+    db.add_item(_make_item(name, department, quantity, expiry_date), verbose=False)
+
+
+def _update_quantity(db, name, department, quantity):
+    _make_item(name, department).update_quantity(db.conn, quantity, verbose=False)
+
+
+def _remove_item(db, name, department):
+    _make_item(name, department).remove_item(db.conn)
+
+
+WRITE_OPERATIONS = {
+    "create_item": _create_item,
+    "update_quantity": _update_quantity,
+    "remove_item": _remove_item,
+    "delete_item": lambda db, item_id: db.delete_item(item_id),
+    "set_quantity": lambda db, item_id, quantity: db.set_quantity(item_id, quantity),
+    "rename_item": lambda db, item_id, new_name: db.rename_item(item_id, new_name),
+}
+
+READ_OPERATIONS = {
+    "get_all_items": lambda db: db.get_all_items(),
+    "filter_by_date": lambda db: db.filter_by_date(),
+    "filter_alphabetically": lambda db: db.filter_alphabetically(),
+    "filter_by_department": lambda db, department: db.filter_by_department(department),
+    "search_item": lambda db, search_type, search_value: db.search_item(search_type, search_value),
+    "get_item": lambda db, item_id: db.get_item(item_id),
+    "get_items": lambda db, item_ids: db.get_items(item_ids),
+    "latest_change_seq": lambda db: db.latest_change_seq(),
+    "changes_since": lambda db, seq: db.changes_since(seq),
+}
+
+
+def to_json(value):
+    # Item records become objects, all other tuples become lists
+    if hasattr(value, "_asdict"):
+        return {key: to_json(field) for key, field in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(element) for element in value]
+    if isinstance(value, dict):
+        return {key: to_json(element) for key, element in value.items()}
+    return value
+
+
+# Connection for the writer: the inventory classes commit after every change, here the writer
+# commits once per batch instead
+class GroupCommitConnection:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def execute(self, *args):
+        return self.conn.execute(*args)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+
+class InventoryService:
+    def __init__(self, db_name="inventory.db", readers=4, max_batch=256, batch_delay=0.0):
+        self.db_name = db_name
+        self.reader_count = readers
+        self.max_batch = max_batch
+        self.batch_delay = batch_delay  # Seconds the writer waits for more operations before committing
+        self.write_queue = None
+        self.readers = None
+        self.writer_executor = None
+        self.writer_db = None
+        self.writer_task = None
+        self.server = None
+        self.last_prune = 0.0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        # SQLite connections belong to the thread that created them, so every connection gets its own thread
+        self.writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inventory-writer")
+        self.writer_db = await loop.run_in_executor(self.writer_executor, self._open_writer)
+        self.readers = asyncio.Queue()
+        for i in range(self.reader_count):
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"inventory-reader-{i}")
+            db = await loop.run_in_executor(executor, InventoryDB, self.db_name)
+            self.readers.put_nowait((executor, db))
+        self.write_queue = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self._writer())
+
+    def _open_writer(self):
+        db = InventoryDB(self.db_name)
+        # WAL lets the readers continue while the writer commits
+        db.conn.execute("PRAGMA journal_mode = WAL")
+        db.conn.isolation_level = None  # Transactions are managed by _commit_batch
+        db.conn = GroupCommitConnection(db.conn)
+        return db
+
+    async def submit(self, op, args=None):
+        # Runs one operation and returns its result, writes are queued for the next group commit
+        args = args or {}
+        loop = asyncio.get_running_loop()
+        if op in WRITE_OPERATIONS:
+            future = loop.create_future()
+            self.write_queue.put_nowait((op, args, future))
+            return await future
+        if op in READ_OPERATIONS:
+            executor, db = await self.readers.get()
+            try:
+                return await loop.run_in_executor(executor, partial(READ_OPERATIONS[op], db, **args))
+            finally:
+                self.readers.put_nowait((executor, db))
+        raise InventoryServiceError(f"Unknown operation '{op}'")
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.write_queue.get()]
+            if self.batch_delay:
+                await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.max_batch and not self.write_queue.empty():
+                batch.append(self.write_queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.writer_executor, self._commit_batch, batch)
+            except Exception as error:
+                results = [(False, error)] * len(batch)
+            for (_, _, future), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            # Keep the change feed from growing without bound while the service runs
+            if loop.time() - self.last_prune >= PRUNE_INTERVAL:
+                self.last_prune = loop.time()
+                try:
+                    await loop.run_in_executor(self.writer_executor, self.writer_db.prune_changes)
+                except Exception as error:
+                    print(f"Could not prune the change feed: {error}")
+
+    def _commit_batch(self, batch):
+        # One transaction for the whole batch, a savepoint per operation so that a failing
+        # operation doesn't undo the others
+        conn = self.writer_db.conn.conn
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for op, args, _ in batch:
+                conn.execute("SAVEPOINT operation")
+                try:
+                    results.append((True, WRITE_OPERATIONS[op](self.writer_db, **args)))
+                except Exception as error:
+                    conn.execute("ROLLBACK TO operation")
+                    results.append((False, error))
+                conn.execute("RELEASE operation")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    async def handle_client(self, reader, writer):
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._answer(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def _answer(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            result = await self.submit(request["op"], request.get("args"))
+            response = {"id": request_id, "ok": True, "result": to_json(result)}
+        except Exception as error:
+            response = {"id": request_id, "ok": False, "error": f"{type(error).__name__}: {error}"}
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+
+    async def serve(self, socket_path):
+        self.server = await asyncio.start_unix_server(self.handle_client, path=socket_path)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.writer_task
+        loop = asyncio.get_running_loop()
+        while self.readers is not None and not self.readers.empty():
+            executor, db = self.readers.get_nowait()
+            await loop.run_in_executor(executor, db.close)
+            executor.shutdown()
+        if self.writer_db is not None:
+            await loop.run_in_executor(self.writer_executor, self.writer_db.close)
+            self.writer_executor.shutdown()
+
+
+# Client for the Unix socket, requests can be sent concurrently over one connection
+class InventoryClient:
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.reader = None
+        self.writer = None
+        self.pending = {}
+        self.next_id = 0
+        self.receiver = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(self.socket_path)
+        self.receiver = asyncio.create_task(self._receive())
+        return self
+
+    async def _receive(self):
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            future = self.pending.pop(response["id"], None)
+            if future is None or future.done():
+                continue
+            if response["ok"]:
+                future.set_result(response["result"])
+            else:
+                future.set_exception(InventoryServiceError(response["error"]))
+        for future in self.pending.values():
+            future.set_exception(InventoryServiceError("Connection to the inventory service closed"))
+        self.pending.clear()
+
+    async def call(self, op, **args):
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        self.writer.write(json.dumps({"id": self.next_id, "op": op, "args": args}).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        if self.receiver is not None:
+            await self.receiver
+
+
+# In-process stand-in for InventoryClient (e.g. for tests): same interface and the same JSON results,
+# but calls the service directly instead of going through a socket
+class InProcessInventoryClient:
+    def __init__(self, service):
+        self.service = service
+
+    async def connect(self):
+        return self
+
+    async def call(self, op, **args):
+        try:
+            result = await self.service.submit(op, args)
+        except Exception as error:
+            raise InventoryServiceError(f"{type(error).__name__}: {error}") from error
+        return json.loads(json.dumps(to_json(result)))
+
+    async def close(self):
+        pass
+
+
+async def main(db_name, socket_path, readers, max_batch, batch_delay):
+    service = InventoryService(db_name, readers, max_batch, batch_delay)
+    await service.start()
+    print(f"Inventory service listening on {socket_path}")
+    try:
+        await service.serve(socket_path)
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local inventory service with group commits.")
+    parser.add_argument("--db", default="inventory.db")
+    parser.add_argument("--socket", default="inventory.sock")
+    parser.add_argument("--readers", type=int, default=4, help="number of reader connections")
+    parser.add_argument("--max-batch", type=int, default=256, help="most operations per commit")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="seconds to wait for more writes before committing")
+    args = parser.parse_args()
+    asyncio.run(main(args.db, args.socket, args.readers, args.max_batch, args.batch_delay))
@@ -1,20 +1,59 @@
 # WebApp for viewing and editing the SHSG Inventorx Database
 
 # Import Libraries
+import os
 import sqlite3
+from contextlib import closing
 import pandas as pd
 import streamlit as st
-from datetime import datetime, timedelta
-from InventoryApp import Inventory, InventoryPerishable 
-import matplotlib.pyplot as plt
+from datetime import datetime
+from InventoryApp import Inventory, InventoryPerishable, InventoryDB
+from DashboardProfiler import SectionProfiler
+from InventoryCharts import chart_version, expiry_frame, load_chart, render_chart
+from InventoryFeed import refresh_inventory_frame
+from InventoryForecast import forecast_report
+
+# Profiling mode (INVENTORY_PROFILE=1 or ?profile=1): time every section of the script run
+profiler = SectionProfiler.from_request(st.query_params)
+
+# Seconds between checks for changes made by other users (CLI or other dashboard sessions)
+POLL_SECONDS = float(os.environ.get("INVENTORY_POLL_SECONDS", 5))
+
+# Connect to Database and query all entries. The table is only read completely once per session,
+# afterwards only the rows changed since the last script run are loaded (see InventoryFeed.py)
+profiler.section("Data load")
+db = InventoryDB('inventory.db')
+conn = db.conn
+st.session_state['inventory_seq'], st.session_state['inventory_df'] = refresh_inventory_frame(
+    db, st.session_state.get('inventory_df'), st.session_state.get('inventory_seq'))
+df = st.session_state['inventory_df'].copy()
+
+# A rerun would close an open dialog and clear a preview, so they hold off the automatic rerun.
+# Every full script run starts without them, they set the flag again when they are shown
+st.session_state['hold_rerun'] = False
+
+# Poll the change feed in the background and rerun the page as soon as the inventory changed
+@st.fragment(run_every=POLL_SECONDS)
+def watch_for_changes():
+    # A plain read-only connection, polling must not write or create anything
+    with closing(sqlite3.connect('file:inventory.db?mode=ro', uri=True)) as poll_conn:
+        latest_seq = InventoryDB.read_change_seq(poll_conn)
+    # Also a lower sequence number, e.g. after the database was restored from a backup
+    if latest_seq != st.session_state['inventory_seq']:
+        if st.session_state['hold_rerun']:
+            st.info("The inventory has changed.")
+            if st.button("Refresh"):
+                profiler.stop()
+                st.rerun()
+        else:
+            profiler.stop()
+            st.rerun()
 
-# Connect to Database and query all entries
-conn = sqlite3.connect('inventory.db')
-query = "SELECT * FROM inventory"
-df = pd.read_sql(query, conn)
+watch_for_changes()
 
 
 # Create two columns to display logo and title next to each other
+profiler.section("Header")
 col1, col2 = st.columns([1, 5], gap="medium", vertical_alignment="center")
 with col1:
     st.image("SHSG_Logo_Circle_100x100mm_RGB_green.6b31ace0.png", width=120)
@@ -33,6 +72,7 @@ st.header("View Database") # The first part of the App we can wiew the database
 st.write ("")
 
 # Section for displaying the database as a dataframe with filtering & sorting options:
+profiler.section("Filtering & sorting")
 
 # Create two columns to display checkboxes and radio buttons next to each other
 col1, col2 = st.columns(2, vertical_alignment="top")
@@ -70,6 +110,7 @@ elif sort_by == "Expiry Date":
     df = df.sort_values(by="expiry_date")  # sorted by expiry date, from closest to fathest
 
 # Display table, use the database-id as index
+profiler.section("Database table")
 st.dataframe(df.set_index('id'), use_container_width=True)
 
 st.write("")
@@ -77,6 +118,7 @@ st.write("")
 
 
 # Section for showing custom overviews for each department:
+profiler.section("Department overview")
 
 st.subheader("Department Overview")
 
@@ -263,139 +305,55 @@ st.write("")
 st.write("")
 
 # Section for viewing graphs & statistict of the inventory:
+profiler.section("Chart data")
 
 st.subheader("Inventory Insights")
 st.write("")
 st.write("")
 
-# Create two colums to display charts next to each other
-# Before creating the columns, we globally define a new data frame first, because wen want to use it for two charts in differnt columns...
-# It's derrived from the original one, but sorted by epiry date, to make expiry-pie-chart creation easier & and show perishables df
-df_piechart2 = df.copy()
-df_piechart2['expiry_date'] = pd.to_datetime(df_piechart2['expiry_date'], errors='coerce').dt.date  # Nur das Datum verwenden
-df_piechart2 = df_piechart2.sort_values(by=['expiry_date'], ascending=[False])
-df_piechart2 = pd.concat([df_piechart2[df_piechart2['expiry_date'].isna()], df_piechart2.dropna(subset=['expiry_date'])])
+# Charts are rendered ahead of time by the chart worker (ChartWorker.py) and stored per data version.
+# Only if the worker isn't running (or hasn't finished the current version yet) they are rendered inline
+current_chart_version = chart_version(st.session_state['inventory_seq'], today)
+if df.empty:
+    chart_variant = None
+elif sort_by == "Expiry Date" or (show_perishables and not show_non_perishables):
+    chart_variant = "perishables"
+elif show_non_perishables and not show_perishables:
+    chart_variant = "non_perishables"
+else:
+    chart_variant = "all"
+
+# Support function to show a pre-rendered chart, or render it inline
+def show_chart(chart):
+    image = load_chart(current_chart_version, chart_variant, chart) if chart_variant else None
+    if image is not None:
+        st.image(image, use_container_width=True)
+    else:
+        st.pyplot(render_chart(chart, df, today))
+
+# Before creating the columns, we globally define a new data frame first, because wen want to use it for the expiry
+# chart and the perishables df. It's derrived from the original one, but sorted by epiry date with a colour for every item
+df_piechart2 = expiry_frame(df, today)
 
+# Create two colums to display charts next to each other
 col1, col2 = st.columns(2)
 with col1:
     # Pie chart for showing department share of inventory:
-    # Create a new data frame from original one - sorted by department
-    df['department'] = pd.Categorical(df['department'], categories=['General', 'ClubA', 'ClubB', 'ClubC'], ordered=True)
-    df_piechart = df.sort_values('department')
-    # Calculate total sum of quantity of all items
-    total_quantity = df_piechart['quantity'].sum()
-    # Define & assign colors for each department
-    colors = {
-        'General': '#98FB98',  # Sanftes Grün
-        'ClubA': '#ADD8E6',    # Helles Blau
-        'ClubB': '#D8BFD8',    # Sanftes Lila
-        'ClubC': '#FFB6C1'     # Sanftes Rosa-Rot
-    }
-    item_colors = [colors[dept] for dept in df_piechart['department']]
-    # Calculate the percentage for each department
-    department_totals = df_piechart.groupby('department')['quantity'].sum()
-    percentages = (department_totals / total_quantity) * 100
-    # Create pie chart
-    fig, ax = plt.subplots(figsize=(10, 10))
-    ax.pie(df_piechart['quantity'], labels=None, colors=item_colors, autopct=None, startangle=90, counterclock=False,
-        wedgeprops={'edgecolor': 'grey', 'linewidth': 0.3})
-    # Define labels for the legend with percentages
-    legend_labels = [f'{dept}: {percentages[dept]:.1f}%' for dept in colors.keys()]
-    # Create legend
-    handles = [plt.Rectangle((0, 0), 1, 1, color=colors[dept]) for dept in colors.keys()]
-    ax.set_title("Share of Quantity by Department", fontsize=20, fontweight='bold')
-    ax.legend(handles, legend_labels, title="Departments", loc="upper right", frameon=False)
-    ax.axis('equal')
-    # Display the plot in Streamlit
-    st.pyplot(fig)
-
+    profiler.section("Chart: department share")
+    show_chart("department_share")
 
     st.write("")
     st.write("")
 
-
     # Pie chart for showing relation of perishables and non-perishables:
-    # This chart makes use of the df_piechart2 dataframe defined before the columns
-
-    # define today's date and date in 30 days
-    today = datetime.today().date()
-    thirty_days_from_now = today + timedelta(days=30)
-
-    # Define & assign colours for items
-    def get_color(expiry_date):
-        if pd.isna(expiry_date):
-            return '#98FB98'  # Green for non-perishables
-        elif expiry_date <= thirty_days_from_now:
-            return '#FF6347'  # Red for perishables expiring within 30 days
-        else:
-            return '#FFA500'  # Orange for other perishables
-    # Assign colors for each item
-    df_piechart2['color'] = df_piechart2['expiry_date'].apply(get_color)
-    # Calculate the total quantity for each color category
-    non_perishables_count = sum(df_piechart2['color'] == '#98FB98')
-    perishables_count = sum(df_piechart2['color'] == '#FFA500')
-    expiring_soon_count = sum(df_piechart2['color'] == '#FF6347')
-    total_count = len(df_piechart2)
-    # Calculate percentages
-    non_perishables_pct = (non_perishables_count / total_count) * 100
-    perishables_pct = (perishables_count / total_count) * 100
-    expiring_soon_pct = (expiring_soon_count / total_count) * 100
-    # Create pie chart
-    fig, ax = plt.subplots(figsize=(10, 10))
-    ax.pie([1] * len(df_piechart2), labels=None, colors=df_piechart2['color'], startangle=90, counterclock=False, wedgeprops={'edgecolor': 'grey', 'linewidth': 0.5})
-    # Define labels for the legend with percentages
-    legend_labels = [
-        f'Non-perish.: {non_perishables_pct:.1f}%', 
-        f'Perish.: {perishables_pct:.1f}%', 
-        f'Exp. 30 d.: {expiring_soon_pct:.1f}%'
-    ]
-    legend_colors = ['#98FB98', '#FFA500', '#FF6347'] 
-    # Create legend
-    handles = [plt.Rectangle((0, 0), 1, 1, color=color) for color in legend_colors]
-    ax.set_title("Items by Expiry Date", fontsize=20, fontweight='bold')
-    ax.legend(handles, legend_labels, title="Expiry Status", loc="upper right", frameon=False)
-    ax.axis('equal')  # Make sure pie is drawn as a circle
-    # Display the plot in Streamlit
-    st.pyplot(fig)
-
-
+    profiler.section("Chart: expiry status")
+    show_chart("expiry_status")
 
 
 with col2:
     # Bar chart for showing total quantity of unique items, show departments:
-   
-    # calculate total quantity of items with same name, group by name and department
-    df_barchart = df.groupby(['name', 'department'], as_index=False)['quantity'].sum()
-    total_quantities = df_barchart.groupby('name')['quantity'].sum().reset_index()
-    total_quantities = total_quantities.sort_values(by='quantity', ascending=True)
-    # Define & assign colours for every department
-    colors = {
-        'General': '#98FB98',  # Sanftes Grün
-        'ClubA': '#ADD8E6',    # Helles Blau
-        'ClubB': '#D8BFD8',    # Sanftes Lila
-        'ClubC': '#FFB6C1'     # Sanftes Rot
-    }
-    df_barchart['color'] = df_barchart['department'].map(colors)
-    # Create bar chart
-    fig, ax = plt.subplots(figsize=(7, 8))
-    # Remove margines ("box" around chart)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['left'].set_visible(False)
-    ax.spines['bottom'].set_visible(False)
-    # Initialize a dictionary for saving total quantity of every item
-    cumulative_quantity = {name: 0 for name in total_quantities['name']}
-    # For every name, stack the bars in the defined colours based on the defined order of departments
-    for name in total_quantities['name']:
-        item_data = df_barchart[df_barchart['name'] == name]
-        for _, row in item_data.iterrows():
-            ax.barh(name, row['quantity'], left=cumulative_quantity[name], color=row['color'])
-            cumulative_quantity[name] += row['quantity']
-    # Define no labeling on axes
-    ax.set_xlabel('')
-    ax.set_ylabel('')
-    ax.set_title('Items by total Quantity and Department', fontsize=18, fontweight='bold')
-    st.pyplot(fig)
+    profiler.section("Chart: quantity by item")
+    show_chart("quantity_by_item")
 
     st.write("")
     st.write("")
@@ -403,6 +361,7 @@ with col2:
 
     
     # Show smaller, adjusted df with items about to expire, sorted from closest date to farthest. it uses the df_pychart2 defined before the columns
+    profiler.section("Next items to expire")
     st.markdown("<h3 style='font-weight: bold; font-size: 15px; text-align: center;'>Next items to expire</h3>", unsafe_allow_html=True)
     st.dataframe(df_piechart2.drop(columns=['quantity', 'id', "color"]).dropna(subset=['expiry_date']).sort_values(by='expiry_date', ascending=True).set_index('name'), use_container_width=True, height=300)
 
@@ -414,6 +373,25 @@ st.write("")
 
 
 
+# Section for restock suggestions per item and department, based on the quantity history (see InventoryForecast.py).
+# The report is cached per data version, so it is only recomputed after changes
+profiler.section("Restock suggestions")
+st.subheader("Restock Suggestions")
+st.write("")
+restock_report = forecast_report(db)
+if restock_report['daily_consumption'].notna().any():
+    reorder_count = int(restock_report['reorder'].sum())
+    if reorder_count:
+        st.markdown(f"<div style='color: red; font-weight: bold;'>🚨 {reorder_count} items should be reordered.</div>", unsafe_allow_html=True)
+    st.dataframe(restock_report.set_index('name'), use_container_width=True, height=300)
+else:
+    st.write("Not enough quantity history yet. Take snapshots regularly with `python InventoryForecast.py snapshot`.")
+
+st.write("")
+st.write("")
+st.write("")
+
+profiler.section("Edit database")
 st.header("Edit Database") # The second part of the App is for editing the database
 st.write("")
 
@@ -421,6 +399,15 @@ departments = Inventory.VALID_DEPARTMENTS  # Use own list of valid departments
 
 st.write("Add a new item to the current inventory:")
 
+# Index of all item names for the "Did you mean an existing item?" check. It is shared by all sessions and
+# only rebuilt after the inventory changed, not on every rerun of the dialog
+@st.cache_resource(max_entries=4)
+def load_name_index(change_seq):
+    index_db = InventoryDB('inventory.db')
+    name_index = index_db.name_index
+    index_db.close()
+    return name_index
+
 # Streamlit form widget for entering item attributes of new items
 with st.form(key='item_form'):
     name = st.text_input('Item name') # Enter name
@@ -434,17 +421,25 @@ with st.form(key='item_form'):
         # Exta pop-up button
         @st.dialog('Confirm Addition')
         def confirm_addition(name, department, quantity, expiry_date):
+            # Offer existing items with a similar name to avoid duplicates like "Beer crate" / "beer crates"
+            similar_names = load_name_index(st.session_state['inventory_seq']).similar_names(name)
+            if similar_names:
+                st.warning("Did you mean an existing item?")
+                name = st.radio("Add as:", [name] + [similar_name for similar_name, _ in similar_names])
             st.write(f"Do you want to add {name} to the inventory?")
             if st.button('Yes'):
                 # Add to database
-                with sqlite3.connect('inventory.db') as conn:
-                    if is_perishable == "Yes":
-                        item = InventoryPerishable(name, department, quantity, expiry_date.strftime("%Y-%m-%d"))
-                    else:
-                        item = Inventory(name, department, quantity)
-                    item.create_item(conn)
-                    st.success('Item added!')
+                if is_perishable == "Yes":
+                    item = InventoryPerishable(name, department, quantity, expiry_date.strftime("%Y-%m-%d"))
+                else:
+                    item = Inventory(name, department, quantity)
+                add_db = InventoryDB('inventory.db')
+                add_db.add_item(item)
+                add_db.prune_changes()
+                add_db.close()
+                st.success('Item added!')
         # display confirmation message
+        st.session_state['hold_rerun'] = True
         confirm_addition(name, department, quantity, expiry_date)
 
 st.write("")
@@ -455,14 +450,21 @@ st.write("Remove an item from the current inventory:")
 # Streamlit form widget for entering id of itm to delete
 delete_id_option = st.text_input("Enter the ID of the item you want to delete", key='delete_id')
 
+# IDs are typed in by hand, so check them before using them
+def parse_item_id(text):
+    text = text.strip()
+    if not text.isdigit():
+        st.error("Please enter a valid item ID (a whole number).")
+        return None
+    return int(text)
+
 # Preview button to show all attributes of item to delete
-if st.button('Preview'):
-    query = "SELECT * FROM inventory"
-    df = pd.read_sql(query, conn)
-    item_data = df[df['id'] == int(delete_id_option)]
-    if not item_data.empty:
+if st.button('Preview') and (preview_id := parse_item_id(delete_id_option)) is not None:
+    st.session_state['hold_rerun'] = True
+    item_data = db.get_item(preview_id)
+    if item_data:
         st.write("Item's Details:")
-        st.dataframe(item_data)
+        st.dataframe(pd.DataFrame([item_data._asdict()]))
     else:
         st.write("No item found with the specified ID.")
 
@@ -471,21 +473,39 @@ if st.button('Preview'):
 
 # Define a function for what shouls happen after clicking "delete", all within dialog pop-up window
 def confirm_delete(delete_id_option):
-    st.write(f"Are you sure you want to delete item with ID {delete_id_option}?")
+    delete_id = parse_item_id(delete_id_option)
+    if delete_id is None:
+        return
+    # The dialog reruns on its own, so it uses its own connection
+    delete_db = InventoryDB('inventory.db')
+    item_data = delete_db.get_item(delete_id)
+    if item_data:
+        st.write(f"Are you sure you want to delete {item_data.name} ({item_data.department}) with ID {delete_id_option}?")
+    else:
+        st.write(f"Are you sure you want to delete item with ID {delete_id_option}?")
     if st.button('Yes'):
-        with sqlite3.connect('inventory.db') as conn:
-            query = "DELETE FROM inventory WHERE id = ?"
-            cur = conn.cursor()
-            cur.execute(query,(int(delete_id_option),))
-            conn.commit()
-            if cur.rowcount:
-                st.success(f'Item {delete_id_option} removed successfully!')
-            else:
-                st.error(f'Failed to remove item {delete_id_option}. Please try again.')
+        if delete_db.delete_item(delete_id):
+            delete_db.prune_changes()
+            st.success(f'Item {delete_id_option} removed successfully!')
+        else:
+            st.error(f'Failed to remove item {delete_id_option}. Please try again.')
+    delete_db.close()
 
 # Button that triggers dialog
 if st.button('Delete'):
+    st.session_state['hold_rerun'] = True
     confirm_delete(delete_id_option)
    
 # close connection to database
-conn.close()
\ No newline at end of file
+conn.close()
+
+# Show the profiling breakdown at the end of the page
+if profiler.enabled:
+    breakdown = profiler.finish()
+    st.write("")
+    st.subheader("Profiling")
+    st.dataframe(breakdown, use_container_width=True)
+    if profiler.dump_path:
+        st.write(f"cProfile output saved to `{profiler.dump_path}`")
+        with st.expander("Hottest functions"):
+            st.text(profiler.top_functions())
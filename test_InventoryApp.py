@@ -0,0 +1,172 @@
+# Tests for InventoryDB, run with: python -m pytest test_InventoryApp.py
+
+import itertools
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime
+
+from InventoryApp import Inventory, InventoryDB, InventoryItem, InventoryPerishable, TrigramIndex
+
+
+class ChangeFeedTest(unittest.TestCase):
+    def setUp(self):
+        self.db = InventoryDB(":memory:")
+        self.db.add_item(Inventory("Beer", "ClubA", 5), verbose=False)
+        self.db.add_item(InventoryPerishable("Chips", "General", 2, "2030-01-31"), verbose=False)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_insert(self):
+        seq = self.db.latest_change_seq()
+        self.db.add_item(Inventory("Wine", "ClubB", 3), verbose=False)
+        self.assertEqual(self.db.changes_since(seq), (seq + 1, [InventoryItem(3, "Wine", "ClubB", 3)], []))
+
+    def test_update(self):
+        seq = self.db.latest_change_seq()
+        self.db.set_quantity(1, 9)
+        self.db.set_quantity(1, 8)
+        latest, rows, deleted_ids = self.db.changes_since(seq)
+        self.assertEqual(latest, seq + 2)
+        self.assertEqual(rows, [InventoryItem(1, "Beer", "ClubA", 8)])  # One row per item, with its current values
+        self.assertEqual(deleted_ids, [])
+
+    def test_delete(self):
+        seq = self.db.latest_change_seq()
+        self.db.set_quantity(2, 1)
+        self.db.delete_item(2)
+        self.assertEqual(self.db.changes_since(seq), (seq + 2, [], [2]))
+
+    def test_all_changes(self):
+        latest, rows, deleted_ids = self.db.changes_since(0)
+        self.assertEqual(latest, 2)
+        self.assertEqual(sorted(row.name for row in rows), ["Beer", "Chips"])
+        self.assertEqual(deleted_ids, [])
+
+    def test_up_to_date(self):
+        seq = self.db.latest_change_seq()
+        self.assertEqual(self.db.changes_since(seq), (seq, [], []))
+
+    def test_pruned_changes(self):
+        for quantity in range(10):
+            self.db.set_quantity(1, quantity)
+        self.db.prune_changes(keep=5)
+        latest = self.db.latest_change_seq()
+        self.assertIsNone(self.db.changes_since(latest - 6))
+        self.assertEqual(self.db.changes_since(latest - 5)[0], latest)  # The oldest kept change is still complete
+        self.assertEqual(self.db.changes_since(latest), (latest, [], []))
+
+    def test_database_reset(self):
+        seq = self.db.latest_change_seq()
+        restored = InventoryDB(":memory:")
+        restored.add_item(Inventory("Beer", "ClubA", 5), verbose=False)
+        self.assertIsNone(restored.changes_since(seq))
+        restored.close()
+
+    def test_prune_keeps_recent_changes(self):
+        for quantity in range(10):
+            self.db.set_quantity(1, quantity)
+        self.db.prune_changes(keep=5)
+        self.assertEqual(self.db.conn.execute('SELECT COUNT(*) FROM inventory_changes').fetchone()[0], 5)
+        self.db.prune_changes(keep=5)
+        self.assertEqual(self.db.conn.execute('SELECT COUNT(*) FROM inventory_changes').fetchone()[0], 5)
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.db = InventoryDB(":memory:")
+        self.db.add_item(Inventory("Beer", "ClubA", 5), verbose=False)
+        self.db.add_item(Inventory("Beer", "ClubA", 1), verbose=False)
+        self.db.add_item(Inventory("Wine", "ClubB", 3), verbose=False)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_snapshot_per_name_and_department(self):
+        self.db.take_snapshot(datetime(2026, 10, 1, 12))
+        self.assertEqual(sorted(self.db.get_snapshots()),
+                         [("2026-10-01T12:00:00", "Beer", "ClubA", 6), ("2026-10-01T12:00:00", "Wine", "ClubB", 3)])
+
+    def test_snapshot_due_once_per_day(self):
+        self.assertTrue(self.db.snapshot_due())
+        self.db.take_snapshot(datetime(2026, 10, 1, 12))
+        self.assertFalse(self.db.snapshot_due(now=datetime(2026, 10, 2, 11)))
+        self.assertTrue(self.db.snapshot_due(now=datetime(2026, 10, 2, 12)))
+
+    def test_old_snapshots_are_deleted(self):
+        self.db.take_snapshot(datetime(2025, 9, 1))
+        self.db.take_snapshot(datetime(2025, 10, 15))
+        self.db.take_snapshot(datetime(2026, 10, 1))
+        self.assertEqual(sorted({row[0][:10] for row in self.db.get_snapshots()}), ["2025-10-15", "2026-10-01"])
+
+
+class TrigramIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex(["Beer crate", "Beer crates", "Red wine", "White wine", "Paper cups"])
+
+    def test_search(self):
+        results = self.index.search("beer crate")
+        self.assertEqual(results[0], ("Beer crate", 1.0))  # Case and spacing don't matter
+        self.assertEqual([name for name, _ in results], ["Beer crate", "Beer crates"])
+        self.assertEqual({name for name, _ in self.index.search("wine", min_score=0.1)}, {"Red wine", "White wine"})
+        self.assertEqual(self.index.search("xyz"), [])
+        self.assertEqual(len(self.index.search("wine", k=1, min_score=0.1)), 1)
+
+    def test_similar_names(self):
+        self.assertEqual([name for name, _ in self.index.similar_names("beer crate")], ["Beer crate", "Beer crates"])
+        self.assertEqual(self.index.similar_names("Beer crate"), [])  # Exists exactly
+        self.assertEqual(self.index.similar_names("Napkins"), [])
+
+    def test_add_and_discard(self):
+        self.index.add("Napkins")
+        self.assertIn("Napkins", self.index)
+        self.index.discard("Napkins")
+        self.index.discard("Napkins")
+        self.assertNotIn("Napkins", self.index)
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.search("napkins"), [])
+
+    def test_duplicate_pairs(self):
+        pairs = self.index.duplicate_pairs()
+        self.assertEqual([(first, second) for first, second, _ in pairs], [("Beer crate", "Beer crates")])
+
+    def test_duplicate_pairs_match_brute_force(self):
+        # The prefix filter must not miss any pair that comparing every pair would find
+        rng = random.Random(7)
+        words = ["beer", "beers", "wine", "cola", "cup", "cups", "crate", "paper", "red", "white", "box"]
+        names = {" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(300)}
+        index = TrigramIndex(names)
+        for min_score in (0.3, 0.5, 0.6, 0.8):
+            expected = set()
+            for first, second in itertools.combinations(index.trigrams, 2):
+                a, b = index.trigrams[first], index.trigrams[second]
+                if len(a & b) / len(a | b) >= min_score:
+                    expected.add(frozenset((first, second)))
+            found = {frozenset((first, second)) for first, second, _ in index.duplicate_pairs(min_score)}
+            self.assertEqual(found, expected)
+
+
+class NameIndexTest(unittest.TestCase):
+    def test_sees_changes_from_other_connections(self):
+        # The CLI keeps its index while the dashboard or the service write through their own connections
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "inventory.db")
+            cli_db, other_db = InventoryDB(path), InventoryDB(path)
+            cli_db.add_item(Inventory("Beer crate", "ClubA", 1), verbose=False)
+            self.assertEqual(cli_db.find_similar_names("Paper cup"), [])
+            other_db.add_item(Inventory("Paper cups", "General", 1), verbose=False)
+            self.assertEqual([name for name, _ in cli_db.find_similar_names("Paper cup")], ["Paper cups"])
+            other_db.rename_item(2, "Napkins")
+            self.assertEqual(cli_db.find_similar_names("Paper cup"), [])
+            self.assertIn("Napkins", cli_db.name_index)
+            other_db.delete_item(2)
+            self.assertNotIn("Napkins", cli_db.name_index)
+            self.assertEqual(cli_db.duplicate_report(), [])
+            cli_db.close()
+            other_db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
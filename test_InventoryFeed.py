@@ -0,0 +1,57 @@
+# Tests for the cached inventory data frame, run with: python -m pytest test_InventoryFeed.py
+
+import unittest
+
+import pandas as pd
+
+from InventoryApp import Inventory, InventoryDB, InventoryItem
+from InventoryFeed import apply_changes, load_inventory_frame, refresh_inventory_frame
+
+
+class ApplyChangesTest(unittest.TestCase):
+    def setUp(self):
+        self.db = InventoryDB(":memory:")
+
+    def tearDown(self):
+        self.db.close()
+
+    def frame(self):
+        return load_inventory_frame(self.db)[1]
+
+    def test_insert_update_delete(self):
+        for name in ("Beer", "Wine", "Chips"):
+            self.db.add_item(Inventory(name, "ClubA", 1), verbose=False)
+        items_df = self.frame()
+        items_df = apply_changes(items_df, [InventoryItem(4, "Cola", "ClubB", 7), InventoryItem(1, "Beer", "ClubA", 3)], [2])
+        self.assertEqual(items_df["id"].tolist(), [1, 3, 4])
+        self.assertEqual(items_df["quantity"].tolist(), [3, 1, 7])
+        self.assertEqual(items_df["name"].tolist(), ["Beer", "Chips", "Cola"])
+
+    def test_no_changes(self):
+        items_df = self.frame()
+        self.assertIs(apply_changes(items_df, [], []), items_df)
+
+    def test_empty_frame_gets_real_types(self):
+        items_df = apply_changes(self.frame(), [InventoryItem(1, "Beer", "ClubA", 5)], [])
+        self.assertTrue(pd.api.types.is_integer_dtype(items_df["id"]))
+        self.assertTrue(pd.api.types.is_integer_dtype(items_df["quantity"]))
+
+    def test_refresh_matches_full_load(self):
+        self.db.add_item(Inventory("Beer", "ClubA", 5), verbose=False)
+        seq, items_df = refresh_inventory_frame(self.db)
+        self.db.add_item(Inventory("Wine", "ClubB", 3), verbose=False)
+        self.db.set_quantity(1, 2)
+        seq, items_df = refresh_inventory_frame(self.db, items_df, seq)
+        self.assertEqual(seq, self.db.latest_change_seq())
+        pd.testing.assert_frame_equal(items_df, self.frame())
+
+    def test_refresh_reloads_after_reset(self):
+        self.db.add_item(Inventory("Beer", "ClubA", 5), verbose=False)
+        items_df = self.frame()
+        seq, items_df = refresh_inventory_frame(self.db, items_df, 100)
+        self.assertEqual(seq, 1)
+        self.assertEqual(items_df["name"].tolist(), ["Beer"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# Tests for the restock forecast, run with: python -m pytest test_InventoryForecast.py
+
+import math
+import unittest
+
+import pandas as pd
+
+from InventoryForecast import KEYS, compute_forecast
+
+
+def snapshots(*rows):
+    return pd.DataFrame(rows, columns=["taken_at"] + KEYS + ["quantity"])
+
+
+def current(*rows):
+    return pd.DataFrame(rows, columns=KEYS + ["quantity"])
+
+
+def row(report, name):
+    return report.set_index("name").loc[name]
+
+
+class ComputeForecastTest(unittest.TestCase):
+    def test_rate_days_left_and_reorder(self):
+        report = compute_forecast(
+            snapshots(("2026-10-01", "Beer", "ClubA", 10), ("2026-10-05", "Beer", "ClubA", 2)),
+            current(("Beer", "ClubA", 2)),
+            lead_time_days=7, safety_days=3, target_days=30,
+        )
+        beer = row(report, "Beer")
+        self.assertEqual(beer["daily_consumption"], 2.0)  # 8 used in 4 days
+        self.assertEqual(beer["days_left"], 1.0)
+        self.assertEqual(beer["reorder_point"], 20.0)  # 2 per day for lead time + safety days
+        self.assertTrue(beer["reorder"])
+        self.assertEqual(beer["suggested_order"], 72)  # 2 per day for 37 days, minus the 2 in stock
+        self.assertEqual(beer["snapshots"], 2)
+
+    def test_restocks_are_not_consumption(self):
+        report = compute_forecast(
+            snapshots(("2026-10-01", "Cola", "ClubB", 10), ("2026-10-02", "Cola", "ClubB", 4),
+                      ("2026-10-03", "Cola", "ClubB", 20), ("2026-10-04", "Cola", "ClubB", 14)),
+            current(("Cola", "ClubB", 14)),
+        )
+        cola = row(report, "Cola")
+        self.assertEqual(cola["daily_consumption"], 4.0)  # 6 + 6 used in 3 days
+        self.assertEqual(cola["days_left"], 3.5)
+
+    def test_enough_stock(self):
+        report = compute_forecast(
+            snapshots(("2026-10-01", "Cups", "General", 100), ("2026-10-11", "Cups", "General", 90)),
+            current(("Cups", "General", 90)),
+        )
+        cups = row(report, "Cups")
+        self.assertEqual(cups["days_left"], 90.0)
+        self.assertFalse(cups["reorder"])
+        self.assertEqual(cups["suggested_order"], 0)
+
+    def test_one_snapshot_cannot_be_forecast(self):
+        report = compute_forecast(snapshots(("2026-10-01", "Wine", "ClubA", 6)), current(("Wine", "ClubA", 6)))
+        wine = row(report, "Wine")
+        self.assertTrue(math.isnan(wine["daily_consumption"]))
+        self.assertTrue(math.isnan(wine["days_left"]))
+        self.assertFalse(wine["reorder"])
+        self.assertEqual(wine["suggested_order"], 0)
+        self.assertEqual(wine["snapshots"], 1)
+
+    def test_no_consumption_lasts_forever(self):
+        report = compute_forecast(
+            snapshots(("2026-10-01", "Salt", "General", 3), ("2026-10-08", "Salt", "General", 3)),
+            current(("Salt", "General", 3)),
+        )
+        self.assertEqual(row(report, "Salt")["days_left"], math.inf)
+        self.assertFalse(row(report, "Salt")["reorder"])
+
+    def test_archived_items_have_no_stock(self):
+        report = compute_forecast(
+            snapshots(("2026-10-01", "Chips", "ClubC", 8), ("2026-10-05", "Chips", "ClubC", 0)),
+            current(("Beer", "ClubA", 5)),
+        )
+        chips = row(report, "Chips")
+        self.assertEqual(chips["quantity"], 0)
+        self.assertEqual(chips["days_left"], 0.0)
+        self.assertTrue(chips["reorder"])
+        self.assertEqual(report["name"].tolist(), ["Chips", "Beer"])  # Items to reorder come first
+
+    def test_quantities_are_summed_per_department(self):
+        report = compute_forecast(snapshots(), current(("Beer", "ClubA", 2), ("Beer", "ClubA", 3), ("Beer", "ClubB", 1)))
+        self.assertEqual(report.set_index(KEYS)["quantity"].to_dict(), {("Beer", "ClubA"): 5, ("Beer", "ClubB"): 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# Tests for the inventory service, run with: python -m pytest test_InventoryService.py
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from InventoryService import InProcessInventoryClient, InventoryService, InventoryServiceError
+
+
+class InventoryServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.service = InventoryService(os.path.join(self.tmp_dir.name, "inventory.db"), readers=2)
+        await self.service.start()
+        self.client = await InProcessInventoryClient(self.service).connect()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.service.close()
+        self.tmp_dir.cleanup()
+
+    async def test_concurrent_writes_share_one_commit(self):
+        batch_sizes = []
+        commit_batch = self.service._commit_batch
+
+        def recording_commit_batch(batch):
+            batch_sizes.append(len(batch))
+            return commit_batch(batch)
+
+        with mock.patch.object(self.service, "_commit_batch", recording_commit_batch):
+            await asyncio.gather(*(
+                self.client.call("create_item", name=f"Item {i}", department="ClubA", quantity=i)
+                for i in range(20)
+            ))
+        self.assertEqual(batch_sizes, [20])
+        self.assertEqual(len(await self.client.call("get_all_items")), 20)
+
+    async def test_failing_operation_does_not_undo_its_batch(self):
+        await self.client.call("create_item", name="Beer", department="ClubA", quantity=5)
+        results = await asyncio.gather(
+            self.client.call("create_item", name="Wine", department="ClubB", quantity=3),
+            self.client.call("rename_item", item_id=1, new_name=None),  # Violates NOT NULL
+            self.client.call("set_quantity", item_id=1, quantity=7),
+            return_exceptions=True,
+        )
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], InventoryServiceError)
+        self.assertIn("IntegrityError", str(results[1]))
+        self.assertTrue(results[2])
+        items = await self.client.call("get_all_items")
+        self.assertEqual([(item["name"], item["quantity"]) for item in items], [("Beer", 7), ("Wine", 3)])
+
+    async def test_results_are_json_objects(self):
+        await self.client.call("create_item", name="Chips", department="General", quantity=2, expiry_date="2030-01-31")
+        self.assertEqual(await self.client.call("get_item", item_id=1), {
+            "id": 1, "name": "Chips", "department": "General", "quantity": 2, "expiry_date": "2030-01-31",
+        })
+        self.assertIsNone(await self.client.call("get_item", item_id=2))
+        latest, changed, deleted = await self.client.call("changes_since", seq=0)
+        self.assertEqual(latest, 1)
+        self.assertEqual([item["name"] for item in changed], ["Chips"])
+        self.assertEqual(deleted, [])
+
+    async def test_get_items_has_string_keys(self):
+        await self.client.call("create_item", name="Beer", department="ClubA", quantity=5)
+        await self.client.call("create_item", name="Wine", department="ClubB", quantity=3)
+        items = await self.client.call("get_items", item_ids=[1, 2, 3])
+        self.assertEqual(sorted(items), ["1", "2"])
+        self.assertEqual(items["2"]["name"], "Wine")
+
+    async def test_unknown_operation(self):
+        with self.assertRaises(InventoryServiceError):
+            await self.client.call("drop_table")
+
+
+if __name__ == "__main__":
+    unittest.main()